@@ -129,6 +129,7 @@ from cloudharness_django.settings import *  # noqa E402
 
 # add the local apps
 INSTALLED_APPS += [
+    "django.contrib.postgres",
     "sckanner",
     "django_baseapp",
     "ninja",
@@ -144,6 +145,21 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 STATIC_URL = "/static/"
 
+# Per-worker in-process cache of the data derived from snapshots (see sckanner.services.snapshot_cache)
+SNAPSHOT_CACHE_MAX_BYTES = int(os.environ.get("SNAPSHOT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Seconds a worker keeps the snapshot catalog (see sckanner.services.snapshot_catalog); saving
+# a snapshot invalidates it at once in the saving process, the others catch up within this delay
+SNAPSHOT_CATALOG_CACHE_SECONDS = int(os.environ.get("SNAPSHOT_CATALOG_CACHE_SECONDS", 60))
+
+# Threads of each worker running the file reads and encoding of the async endpoints (see sckanner.services.executor)
+API_EXECUTOR_MAX_WORKERS = int(os.environ.get("API_EXECUTOR_MAX_WORKERS", 4))
+
+# Ingestion: what to do with invalid statements (fail, skip or quarantine), and processes
+# validating the statements (see sckanner.services.ingestion.statement_validation)
+STATEMENT_VALIDATION_POLICY = os.environ.get("STATEMENT_VALIDATION_POLICY", "fail")
+STATEMENT_VALIDATION_WORKERS = int(os.environ.get("STATEMENT_VALIDATION_WORKERS", 4))
+
 # KC Client & roles
 KC_CLIENT_NAME = PROJECT_NAME.lower()
 
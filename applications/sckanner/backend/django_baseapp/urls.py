@@ -19,13 +19,14 @@ from django.views.static import serve
 from django.contrib import admin
 from django.urls import path, re_path
 from sckanner.api import api
+from sckanner.views import serve_media
 from django_baseapp.views import index
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", api.urls),
-    re_path(r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")), serve, kwargs=dict(document_root=settings.MEDIA_ROOT)),
+    re_path(r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")), serve_media, kwargs=dict(document_root=settings.MEDIA_ROOT)),
     re_path(r"^%s(?P<path>.*)$" % re.escape(settings.STATIC_URL.lstrip("/")), serve, kwargs=dict(document_root=settings.STATIC_ROOT)),
     re_path(r"^(?P<path>.*)$", index, name="index"),
 ]
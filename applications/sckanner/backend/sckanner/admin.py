@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ConnectivityStatement, DataSnapshot, DataSource
+from .models import ConnectivityStatement, DataSnapshot, DataSnapshotStatus, DataSource
 from django.utils.translation import gettext_lazy as _
 from django.contrib import messages
 from django.shortcuts import render
@@ -46,6 +46,7 @@ class LatestSnapshotsFilter(admin.SimpleListFilter):
 
 class ConnectivityStatementAdmin(admin.ModelAdmin):
     list_filter = ("snapshot__source", LatestSnapshotsFilter)
+    raw_id_fields = ("document",)
 
     def has_add_permission(self, request):
         return False  # Disable manual addition since data comes from ingestion
@@ -63,13 +64,22 @@ class DataSnapshotCreateForm(forms.Form):
     )
     version = forms.CharField(label=_("Version"), required=True)
     a_b_via_c_json_url = forms.URLField(label=_('A-B-via-C JSON URL'), required=True, help_text=_('URL to the connection pathways JSON.'))
+    base_snapshot = forms.ModelChoiceField(
+        queryset=DataSnapshot.objects.filter(status=DataSnapshotStatus.COMPLETED),
+        label=_("Base snapshot"),
+        required=False,
+        help_text=_("Completed snapshot of the same source whose unchanged statements are reused instead of being validated and stored again."),
+    )
 
     def clean(self):
         cleaned_data = super().clean()
         source = cleaned_data.get("source")
         version = cleaned_data.get("version")
+        base_snapshot = cleaned_data.get("base_snapshot")
         if DataSnapshot.objects.filter(source=source, version=version).exists():
             raise forms.ValidationError(_("A snapshot with the same version already exists."))
+        if base_snapshot and base_snapshot.source_id != getattr(source, "id", None):
+            raise forms.ValidationError(_("The base snapshot must be a snapshot of the same source."))
         return cleaned_data
 
 
@@ -79,8 +89,8 @@ class DataSnapshotAdmin(admin.ModelAdmin):
     list_filter = ("status", "snapshot_visible", "default", "source")
     ordering = ("-timestamp",)
     exclude = ("status",)
-    fields = ("source", "version", "timestamp", "status", "a_b_via_c_json_file", "snapshot_visible", "default", "message")
-    readonly_fields = ("source", "version", "timestamp", "status", "a_b_via_c_json_file")
+    fields = ("source", "version", "timestamp", "status", "a_b_via_c_json_file", "snapshot_visible", "default", "message", "content_hash", "base_snapshot", "reused_statement_count", "changed_statement_count", "removed_statement_count")
+    readonly_fields = ("source", "version", "timestamp", "status", "a_b_via_c_json_file", "content_hash", "base_snapshot", "reused_statement_count", "changed_statement_count", "removed_statement_count")
 
     def save_model(self, request, obj, form, change):
         """Override save to provide user feedback when setting default"""
@@ -155,8 +165,9 @@ class DataSnapshotAdmin(admin.ModelAdmin):
                 timestamp = form.cleaned_data["timestamp"] or datetime.datetime.now()
                 version = form.cleaned_data["version"]
                 a_b_via_c_json_url = form.cleaned_data.get("a_b_via_c_json_url")
+                base_snapshot = form.cleaned_data.get("base_snapshot")
                 service = ArgoWorkflowService(timestamp=str(timestamp), version=version)
-                service.run_ingestion_workflow(source, a_b_via_c_json_url)
+                service.run_ingestion_workflow(source, a_b_via_c_json_url, base_snapshot)
                 self.message_user(
                     request, _("Snapshot ingestion started."), messages.SUCCESS
                 )
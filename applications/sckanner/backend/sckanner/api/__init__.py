@@ -1,14 +1,73 @@
+import os
 import time
-from typing import Any, Dict, List
-from django.http import HttpRequest
-from ninja import NinjaAPI
+from asgiref.sync import sync_to_async
+from typing import Any, Dict, List, Literal, Union
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from ninja import NinjaAPI, Query
+from ninja.errors import HttpError
 
 from sckanner.models import ConnectivityStatement, DataSnapshot, DataSnapshotStatus
 from ..exceptions import Http401, Http403
-from sckanner.schema import DataSnapshotSchema
+from sckanner.schema import (
+    DataSnapshotCatalogSchema,
+    DataSnapshotSchema,
+    EntitySearchSchema,
+    FacetValueSchema,
+    ForwardPathsSchema,
+    HeatmapSchema,
+    HierarchySchema,
+    KnowledgeStatementFiltersSchema,
+    KnowledgeStatementLookupResultSchema,
+    KnowledgeStatementLookupSchema,
+    KnowledgeStatementPageSchema,
+    SnapshotDiffSchema,
+    SummaryHeatmapFiltersSchema,
+    SummaryHeatmapSchema,
+    StatementSearchSchema,
+)
+from sckanner.services.bitmap_index import get_filtered_statement_mask
 from sckanner.services.datasnapshot import (
     filter_datasnapshot_by_if_a_b_via_c_json_file_exists,
 )
+from sckanner.services.executor import run_in_api_executor
+from sckanner.services.facets import get_snapshot_facets
+from sckanner.services.forward_connections import FORWARD_PATHS_MAX_DEPTH, get_forward_paths
+from sckanner.services.heatmap import get_heatmap
+from sckanner.services.hierarchy import get_compact_hierarchy, get_snapshot_hierarchy
+from sckanner.services.http_cache import (
+    aget_completed_snapshot_payload_hashes,
+    get_content_etag,
+    get_snapshot_etag,
+    patch_immutable_cache_control,
+    patch_revalidate_cache_control,
+)
+from sckanner.services.knowledge_statements import (
+    KNOWLEDGE_STATEMENTS_LOOKUP_MAX_SIZE,
+    KNOWLEDGE_STATEMENTS_PAGE_MAX_LIMIT,
+    get_knowledge_statements_by_reference_uris_json,
+    get_knowledge_statements_page_json,
+    get_snapshot_statements,
+    parse_statement_fields,
+    stream_knowledge_statements_json,
+)
+from sckanner.services.search import SEARCH_MAX_LIMIT, search_entities, search_statements
+from sckanner.services.snapshot_cache import snapshot_cache
+from sckanner.services.snapshot_catalog import get_snapshot_catalog
+from sckanner.services.snapshot_diff import get_snapshot_diff
+from sckanner.services.snapshot_entities import stream_compact_knowledge_statements_json
+from sckanner.services.snapshot_payload import (
+    find_snapshot_payload,
+    get_accepted_binary_format,
+    get_payload_media_type,
+    is_encoding_accepted,
+    read_payload_file,
+    stream_payload_file,
+)
+from sckanner.services.statement_export import gzip_stream, parse_export_columns, stream_statements_csv
+from sckanner.services.statement_filters import filter_statements, has_statement_filters
+from sckanner.services.summary_heatmap import get_summary_heatmap
 
 api = NinjaAPI(title='sckanner API', version='0.1.0')
 
@@ -45,16 +104,312 @@ def live(request: HttpRequest):
 def ready(request: HttpRequest):
     return 'OK'
 
-@api.get('/knowledge-statements', response=List[Dict[str, Any]], tags=['knowledge'])
-def get_knowledge_statements(request, datasnapshot_id: int):
-    statements = ConnectivityStatement.objects.filter(snapshot_id=datasnapshot_id)
-    return [statement.data for statement in statements]  # Directly return the JSON data at the root
+
+@api.get('/cache-stats', response={200: Dict[str, int]}, tags=['admin'], include_in_schema=False)
+def cache_stats(request: HttpRequest):
+    # Counters of the snapshot cache of the worker serving the request, for staff users only
+    if not request.user.is_authenticated:
+        raise Http401
+    if not request.user.is_staff:
+        raise Http403
+    return snapshot_cache.stats()
+
+@api.get('/knowledge-statements', response=Union[List[Dict[str, Any]], Dict[str, Any]], tags=['knowledge'])
+async def get_knowledge_statements(
+    request, datasnapshot_id: int, format: Literal['full', 'compact', 'arrow'] = 'full'
+):
+    """
+    The statements of a snapshot. With format=compact, an object holding the dictionary
+    of the snapshot's anatomical entities and the statements referencing them by position.
+    With format=arrow, an Arrow IPC stream of the fields the explorer displays and filters on
+    (see sckanner.services.binary_payloads). Clients preferring application/msgpack to JSON
+    get the statements in that encoding when the snapshot's binary payloads were written.
+    """
+    payload_hashes = await aget_completed_snapshot_payload_hashes(datasnapshot_id)
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    binary_format = (
+        get_accepted_binary_format(request.headers.get('Accept', '')) if format != 'arrow' else None
+    )
+    payload = find_snapshot_payload(datasnapshot_id, accept_encoding, binary_format) if binary_format else None
+    if payload is not None:
+        format = binary_format
+    else:
+        payload = find_snapshot_payload(datasnapshot_id, accept_encoding, format)
+    if payload is None and format == 'arrow':
+        raise HttpError(404, 'No Arrow payload was written for this snapshot')
+    path, encoding = payload if payload is not None else (None, 'identity')
+    content_type = get_payload_media_type(format)
+    last_modified = int(os.path.getmtime(path)) if path else None
+    # Only payload files are immutable: what is streamed from the statements depends on the code serializing them
+    payload_hash = (payload_hashes or {}).get(format, {}).get(encoding) if path else None
+    etag = get_snapshot_etag(payload_hash) if payload_hash else None
+
+    if etag:
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            patch_vary_headers(not_modified, ('Accept',))
+            return _with_snapshot_headers(not_modified, etag, last_modified, encoding if path else None)
+
+    if path is None:
+        # Stream the JSON documents at the root instead of building the whole list in memory
+        stream = (
+            stream_compact_knowledge_statements_json(datasnapshot_id)
+            if format == 'compact'
+            else stream_knowledge_statements_json(datasnapshot_id)
+        )
+        response = StreamingHttpResponse(stream, content_type='application/json')
+    elif payload_hash:
+        # Serve the payload precompressed at ingestion, kept in this worker's cache
+        cache_key = (datasnapshot_id, payload_hash, 'payload')
+        content = snapshot_cache.get(cache_key)
+        if content is None:
+            content = await run_in_api_executor(read_payload_file, path)
+            snapshot_cache.set(cache_key, content, len(content))
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        response = StreamingHttpResponse(stream_payload_file(path), content_type=content_type)
+        response['Content-Length'] = os.path.getsize(path)
+    patch_vary_headers(response, ('Accept',))
+    return _with_snapshot_headers(response, etag, last_modified, encoding if path else None)
+
+
+def _with_snapshot_headers(response, etag, last_modified, payload_encoding):
+    if payload_encoding is not None:
+        if payload_encoding != 'identity':
+            response['Content-Encoding'] = payload_encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    if etag:
+        response['ETag'] = etag
+        patch_immutable_cache_control(response)
+    return response
+
+
+@api.get('/knowledge-statements/export.csv', tags=['knowledge'])
+async def export_knowledge_statements_csv(
+    request,
+    datasnapshot_id: int,
+    filters: Query[KnowledgeStatementFiltersSchema],
+    columns: str = None,
+):
+    """
+    Statements of a snapshot matching the explorer filters as CSV, with the columns of
+    the explorer's CSV export, streamed as they are read (gzipped if the client accepts it).
+    columns is a comma separated list of the columns to export, all of them by default.
+    """
+    try:
+        columns = parse_export_columns(columns)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+    statements = await sync_to_async(_get_filtered_statements)(datasnapshot_id, filters)
+    stream = stream_statements_csv(statements, columns)
+    gzipped = is_encoding_accepted(request.headers.get('Accept-Encoding', ''), 'gzip')
+    response = StreamingHttpResponse(
+        gzip_stream(stream) if gzipped else stream, content_type='text/csv; charset=utf-8'
+    )
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Disposition'] = f'attachment; filename="knowledge-statements-{datasnapshot_id}.csv"'
+    return response
+
+
+def _get_filtered_statements(datasnapshot_id: int, filters):
+    # The filters query the hierarchy nodes, so the queryset is built in a thread
+    snapshot = _get_snapshot_or_404(datasnapshot_id)
+    hierarchy = get_snapshot_hierarchy(snapshot) if filters.end_organ else None
+    return filter_statements(get_snapshot_statements(datasnapshot_id), filters, datasnapshot_id, hierarchy)
+
+
+@api.get('/knowledge-statements/{statement_id}/forward-paths', response=ForwardPathsSchema, tags=['knowledge'])
+def get_statement_forward_paths(
+    request,
+    statement_id: int,
+    depth: int = Query(FORWARD_PATHS_MAX_DEPTH, ge=1, le=FORWARD_PATHS_MAX_DEPTH),
+):
+    """
+    Forward connection paths of a statement (lists of statement ids, at most depth connections long),
+    the statements forwarding to it, and the reference URIs of all of them.
+    """
+    statement = (
+        ConnectivityStatement.objects.filter(id=statement_id)
+        .only('id', 'reverse_ids', 'forward_paths')
+        .first()
+    )
+    if statement is None:
+        raise HttpError(404, f'Statement {statement_id} not found')
+    paths = get_forward_paths(statement, depth)
+    ids = {statement_id, *statement.reverse_ids, *(path_id for path in paths for path_id in path)}
+    return {
+        'paths': paths,
+        'reverse_ids': statement.reverse_ids,
+        'reference_uris': dict(
+            ConnectivityStatement.objects.filter(id__in=ids).values_list('id', 'reference_uri')
+        ),
+    }
+
+
+@api.get('/v2/knowledge-statements', response=KnowledgeStatementPageSchema, tags=['knowledge'])
+def get_knowledge_statements_page(
+    request,
+    datasnapshot_id: int,
+    filters: Query[KnowledgeStatementFiltersSchema],
+    cursor: int = None,
+    limit: int = Query(500, ge=1, le=KNOWLEDGE_STATEMENTS_PAGE_MAX_LIMIT),
+    fields: str = None,
+):
+    """
+    Statements of a snapshot matching the explorer filters, page by page:
+    pass the returned next_cursor as cursor to get the next page.
+    fields is a comma separated list of top-level statement fields to return.
+    """
+    try:
+        fields = parse_statement_fields(fields)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+    snapshot = _get_snapshot_or_404(datasnapshot_id)
+    statements = get_snapshot_statements(datasnapshot_id)
+    if has_statement_filters(filters):
+        # The bitmap index resolves the filters, the page is then read by primary key
+        index, mask = get_filtered_statement_mask(snapshot, filters)
+        statement_ids = index.get_statement_ids(mask)
+        if cursor is not None:
+            statement_ids = statement_ids[statement_ids > cursor]
+        statements = statements.filter(id__in=statement_ids[: limit + 1].tolist())
+    return HttpResponse(
+        get_knowledge_statements_page_json(statements, cursor, limit, fields),
+        content_type='application/json',
+    )
+
+
+@api.post('/knowledge-statements/lookup', response=KnowledgeStatementLookupResultSchema, tags=['knowledge'])
+def lookup_knowledge_statements(request, lookup: KnowledgeStatementLookupSchema):
+    """
+    Statements of a snapshot by reference URI, e.g. the statements of a heatmap cell,
+    optionally projected to the given top-level fields.
+    """
+    if len(lookup.reference_uris) > KNOWLEDGE_STATEMENTS_LOOKUP_MAX_SIZE:
+        raise HttpError(400, f'At most {KNOWLEDGE_STATEMENTS_LOOKUP_MAX_SIZE} reference URIs can be looked up at once')
+    try:
+        fields = parse_statement_fields(','.join(lookup.fields))
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+    _get_snapshot_or_404(lookup.datasnapshot_id)
+    return HttpResponse(
+        get_knowledge_statements_by_reference_uris_json(lookup.datasnapshot_id, lookup.reference_uris, fields),
+        content_type='application/json',
+    )
+
+
+@api.get('/heatmap', response=HeatmapSchema, tags=['knowledge'])
+def get_heatmap_counts(
+    request,
+    datasnapshot_id: int,
+    filters: Query[KnowledgeStatementFiltersSchema],
+    expanded: List[str] = Query([]),
+):
+    """
+    Unique statement counts of the heatmap rows (the hierarchy roots, and the children
+    of the expanded nodes) for each end organ, restricted by the explorer filters.
+    """
+    snapshot = _get_snapshot_or_404(datasnapshot_id)
+    statement_selection = None
+    if has_statement_filters(filters):
+        index, mask = get_filtered_statement_mask(snapshot, filters)
+        statement_selection = index.get_statement_selection(mask)
+    return get_heatmap(snapshot, expanded, statement_selection, filters.end_organ or None)
+
+
+@api.get('/heatmap/summary', response=SummaryHeatmapSchema, tags=['knowledge'])
+def get_summary_heatmap_counts(
+    request,
+    datasnapshot_id: int,
+    end_organ_id: str,
+    node_id: str,
+    filters: Query[SummaryHeatmapFiltersSchema],
+    expanded: List[str] = Query([]),
+):
+    """
+    Unique statement counts of the summary heatmap of an end organ and a hierarchy node:
+    rows are the node and the children of the expanded nodes under it, columns the sub organs
+    of the end organ, and each cell holds a count per phenotype.
+    """
+    summary = get_summary_heatmap(_get_snapshot_or_404(datasnapshot_id), end_organ_id, node_id, expanded, filters)
+    if summary is None:
+        raise HttpError(404, f'End organ {end_organ_id!r} or hierarchy node {node_id!r} not found')
+    return summary
+
+
+@api.get('/facets', response=Dict[str, List[FacetValueSchema]], tags=['knowledge'])
+def get_facets(request, datasnapshot_id: int, filters: Query[KnowledgeStatementFiltersSchema]):
+    """
+    Options of the explorer filters (phenotype, apinatomy, species, origin, via and entity)
+    with the number of statements having each of them, among the statements matching
+    the filters when some are given.
+    """
+    snapshot = _get_snapshot_or_404(datasnapshot_id)
+    mask = get_filtered_statement_mask(snapshot, filters)[1] if has_statement_filters(filters) else None
+    return get_snapshot_facets(snapshot, mask)
+
+
+@api.get('/hierarchy', response=HierarchySchema, tags=['knowledge'])
+def get_hierarchy(request, datasnapshot_id: int, node_id: str = ''):
+    """
+    The anatomical hierarchy of a snapshot, or the subtree of node_id, depth first:
+    parents holds the index of each node's parent (-1 for the top nodes) and ids the last
+    component of the node ids, so a node id is its parent's id, '#' and its own.
+    """
+    hierarchy = get_compact_hierarchy(datasnapshot_id, node_id)
+    if hierarchy is None:
+        raise HttpError(404, f'Hierarchy node {node_id!r} of snapshot {datasnapshot_id} not found')
+    return hierarchy
+
+
+@api.get('/search/statements', response=StatementSearchSchema, tags=['search'])
+def search_snapshot_statements(
+    request,
+    datasnapshot_id: int,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Statements of a snapshot matching q in their labels, text or reference URI, best ranked first.
+    """
+    return search_statements(datasnapshot_id, q, limit, offset)
+
+
+@api.get('/search/entities', response=EntitySearchSchema, tags=['search'])
+def search_snapshot_entities(
+    request,
+    datasnapshot_id: int,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Anatomical entities of a snapshot whose name or synonyms contain q, closest names first.
+    """
+    return search_entities(datasnapshot_id, q, limit, offset)
+
+
+def _get_snapshot_or_404(datasnapshot_id: int) -> DataSnapshot:
+    snapshot = DataSnapshot.objects.filter(id=datasnapshot_id).first()
+    if snapshot is None:
+        raise HttpError(404, f'Snapshot {datasnapshot_id} not found')
+    return snapshot
 
 
 @api.get('/datasnapshots', response=List[DataSnapshotSchema], tags=['datasnapshots'])
-def get_datasnapshots(request):
-    datasnapshots = DataSnapshot.objects.completed()
-    return [
+async def get_datasnapshots(request):
+    datasnapshots = [
+        snapshot async for snapshot in DataSnapshot.objects.completed().select_related('source')
+    ]
+    data = [
         DataSnapshotSchema(
             id=snapshot.id,
             timestamp=snapshot.timestamp,
@@ -68,3 +423,35 @@ def get_datasnapshots(request):
             datasnapshots
         )
     ]
+    # The listing changes with the snapshot visibility and default flag, so clients revalidate it
+    response = api.create_response(request, [snapshot.model_dump() for snapshot in data], status=200)
+    etag = get_content_etag(response.content)
+    response['ETag'] = etag
+    patch_revalidate_cache_control(response)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+@api.get('/datasnapshots/catalog', response=List[DataSnapshotCatalogSchema], tags=['datasnapshots'])
+def get_datasnapshot_catalog(request):
+    """
+    The snapshots of /datasnapshots with their content hash, statement count,
+    payload sizes and ingestion duration.
+    """
+    response = api.create_response(request, get_snapshot_catalog(), status=200)
+    etag = get_content_etag(response.content)
+    response['ETag'] = etag
+    patch_revalidate_cache_control(response)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+@api.get(
+    '/datasnapshots/{datasnapshot_id}/diff/{other_datasnapshot_id}',
+    response=SnapshotDiffSchema,
+    tags=['datasnapshots'],
+)
+def get_datasnapshot_diff(request, datasnapshot_id: int, other_datasnapshot_id: int):
+    """
+    Reference URIs of the statements added, removed and modified from snapshot
+    datasnapshot_id to snapshot other_datasnapshot_id, with the fields each modification changed.
+    """
+    return get_snapshot_diff(_get_snapshot_or_404(datasnapshot_id), _get_snapshot_or_404(other_datasnapshot_id))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sckanner'
+
+    def ready(self):
+        from sckanner import signals  # noqa: F401
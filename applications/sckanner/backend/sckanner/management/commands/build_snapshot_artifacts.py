@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from sckanner.models import DataSnapshot, DataSnapshotStatus
+from sckanner.services.ingestion.snapshot_artifacts import build_snapshot_artifacts
+from sckanner.services.ingestion.logger_service import logger
+
+
+class Command(BaseCommand):
+    help = "(Re)build the artifacts derived at ingestion time for completed snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--snapshot_id",
+            type=int,
+            default=None,
+            help="The snapshot to build the artifacts for - all completed snapshots when omitted",
+        )
+
+    def handle(self, *args, **kwargs):
+        snapshot_id = kwargs.get("snapshot_id", None)
+        snapshots = DataSnapshot.objects.filter(status=DataSnapshotStatus.COMPLETED)
+        if snapshot_id is not None:
+            snapshots = snapshots.filter(id=snapshot_id)
+            if not snapshots.exists():
+                raise CommandError(f"Invalid snapshot: {snapshot_id}")
+
+        for snapshot in snapshots.order_by("id"):
+            self.stdout.write(f"Building artifacts for {snapshot}")
+            logger.info(f"Building artifacts for {snapshot}")
+            build_snapshot_artifacts(snapshot)
+        self.stdout.write("Snapshot artifacts built successfully!")
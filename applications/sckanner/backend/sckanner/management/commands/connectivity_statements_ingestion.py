@@ -7,6 +7,7 @@ from sckanner.services.ingestion.connectivity_statement_ingestion_service import
 )
 from sckanner.models import DataSource, DataSnapshot, DataSnapshotStatus
 from sckanner.services.ingestion.logger_service import logger
+from sckanner.services.ingestion.statement_validation import VALIDATION_POLICIES
 
 class Command(BaseCommand):
     help = "Run the ingestion workflow for Sckanner - works with Argo"
@@ -33,6 +34,19 @@ class Command(BaseCommand):
             default=None,
             help="The URL to the A-B-via-C JSON file",
         )
+        parser.add_argument(
+            "--base_snapshot_id",
+            type=int,
+            default=None,
+            help="A snapshot of the same source whose unchanged statements are reused",
+        )
+        parser.add_argument(
+            "--validation_policy",
+            type=str,
+            choices=VALIDATION_POLICIES,
+            default=None,
+            help="What to do with invalid statements: fail the ingestion, skip them or quarantine them (default: the STATEMENT_VALIDATION_POLICY setting)",
+        )
 
     def handle(self, *args, **kwargs):
         self.stdout.write("Starting the connectivity statements ingestion django command")
@@ -41,9 +55,12 @@ class Command(BaseCommand):
         source_id = kwargs.get("source_id", None)
         snapshot_id = kwargs.get("snapshot_id", None)
         a_b_via_c_json_url = kwargs.get("a_b_via_c_json_url", None)
+        base_snapshot_id = kwargs.get("base_snapshot_id", None)
+        validation_policy = kwargs.get("validation_policy", None)
         logger.info(f"Source ID: {source_id}")
         logger.info(f"Snapshot ID: {snapshot_id}")
         logger.info(f"A-B-via-C JSON URL: {a_b_via_c_json_url}")
+        logger.info(f"Base snapshot ID: {base_snapshot_id}")
 
         snapshot = None
         try:
@@ -52,9 +69,10 @@ class Command(BaseCommand):
             a_b_via_c_json_url = self.validate_if_a_b_via_c_json_url_is_provided(
                 a_b_via_c_json_url, snapshot
             )
+            base_snapshot = self.validate_if_base_snapshot_exists(base_snapshot_id, snapshot)
 
             # Trigger the ingestion adapter
-            ingestion_service = ConnectivityStatementIngestionService(snapshot)
+            ingestion_service = ConnectivityStatementIngestionService(snapshot, base_snapshot, validation_policy)
             ingestion_service.download_and_save_a_b_via_c_json_file(a_b_via_c_json_url)
             ingestion_service.run_ingestion(source)
             snapshot = self.update_snapshot_status(
@@ -89,6 +107,21 @@ class Command(BaseCommand):
             raise ValueError(f"Invalid snapshot: {snapshot_id}")
         return snapshot
 
+    def validate_if_base_snapshot_exists(self, base_snapshot_id, snapshot):
+        if base_snapshot_id is None:
+            return None
+        base_snapshot = DataSnapshot.objects.filter(
+            id=base_snapshot_id, source_id=snapshot.source_id, status=DataSnapshotStatus.COMPLETED
+        ).first()
+        if base_snapshot is None:
+            snapshot = self.update_snapshot_status(
+                snapshot,
+                DataSnapshotStatus.FAILED,
+                error_message=f"Invalid base snapshot: {base_snapshot_id}",
+            )
+            raise ValueError(f"Invalid base snapshot: {base_snapshot_id}")
+        return base_snapshot
+
     def validate_if_reference_uri_key_is_provided(self, reference_uri_key, snapshot):
         if not reference_uri_key:
             snapshot = self.update_snapshot_status(
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0010_datasnapshot_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the snapshot payload and A-B-via-C file, computed at ingestion', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:10
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 500
+
+
+# Frozen copy of sckanner.services.statement_fields at the time of this migration,
+# so later changes to the service do not change what the migration does
+
+
+def get_anatomical_entity_id(entity):
+    region_layer = entity.get('region_layer')
+    if region_layer:
+        return f"{region_layer['region']['ontology_uri']} ({region_layer['layer']['ontology_uri']})"
+    return (entity.get('simple_entity') or {}).get('ontology_uri') or ''
+
+
+def unique(values):
+    return list(dict.fromkeys(value for value in values if value))
+
+
+def extract_statement_filter_fields(data):
+    destination_ids = []
+    for destination in data.get('destinations') or []:
+        for entity in destination.get('anatomical_entities') or []:
+            destination_ids.append(get_anatomical_entity_id(entity))
+            region_layer = entity.get('region_layer')
+            if region_layer:
+                destination_ids.extend([region_layer['region']['ontology_uri'], region_layer['layer']['ontology_uri']])
+    phenotypes = [
+        (data.get('phenotype') or {}).get('name') or '',
+        data.get('circuit_type') or '',
+        data.get('projection') or '',
+    ]
+    return {
+        'phenotypes': unique(phenotypes),
+        'apinatomy': data.get('apinatomy_model') or '',
+        'species_ids': unique(species.get('ontology_uri') for species in data.get('species') or []),
+        'origin_ids': unique(get_anatomical_entity_id(entity) for entity in data.get('origins') or []),
+        'via_ids': unique(
+            get_anatomical_entity_id(entity)
+            for via in data.get('vias') or []
+            for entity in via.get('anatomical_entities') or []
+        ),
+        'destination_ids': unique(destination_ids),
+    }
+
+
+def backfill_filter_fields(apps, schema_editor):
+    ConnectivityStatement = apps.get_model('sckanner', 'ConnectivityStatement')
+    filter_fields = ['phenotypes', 'apinatomy', 'species_ids', 'origin_ids', 'via_ids', 'destination_ids']
+    batch = []
+    for statement in ConnectivityStatement.objects.only('id', 'data').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        for field, value in extract_statement_filter_fields(statement.data).items():
+            setattr(statement, field, value)
+        batch.append(statement)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            ConnectivityStatement.objects.bulk_update(batch, filter_fields)
+            batch = []
+    if batch:
+        ConnectivityStatement.objects.bulk_update(batch, filter_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0011_datasnapshot_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='apinatomy',
+            field=models.TextField(blank=True, db_index=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='destination_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='origin_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='phenotypes',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='species_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='via_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='connectivitystatement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phenotypes'], name='cs_phenotypes_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='connectivitystatement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['species_ids'], name='cs_species_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='connectivitystatement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['origin_ids'], name='cs_origin_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='connectivitystatement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['via_ids'], name='cs_via_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='connectivitystatement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['destination_ids'], name='cs_destination_ids_gin'),
+        ),
+        migrations.RunPython(backfill_filter_fields, migrations.RunPython.noop),
+    ]
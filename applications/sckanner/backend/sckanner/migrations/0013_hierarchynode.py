@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0012_connectivitystatement_filter_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HierarchyNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('depth', models.PositiveIntegerField()),
+                ('numchild', models.PositiveIntegerField(default=0)),
+                ('node_id', models.TextField(help_text="Ids of the node and its ancestors joined with '#', as in the explorer")),
+                ('name', models.TextField()),
+                ('connection_details', models.JSONField(blank=True, null=True)),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hierarchy_nodes', to='sckanner.datasnapshot')),
+            ],
+            options={
+                'unique_together': {('snapshot', 'node_id')},
+            },
+        ),
+    ]
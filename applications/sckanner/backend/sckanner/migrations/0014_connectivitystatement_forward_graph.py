@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0013_hierarchynode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='forward_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='forward_paths',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='reverse_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0014_connectivitystatement_forward_graph'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='SnapshotEntity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_id', models.TextField(help_text="Ontology URI, or 'region URI (layer URI)' for region/layer entities")),
+                ('name', models.TextField()),
+                ('synonyms', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='connectivitystatement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='cs_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='connectivitystatement',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('reference_uri'), name='gin_trgm_ops'), name='cs_reference_uri_trgm'),
+        ),
+        migrations.AddField(
+            model_name='snapshotentity',
+            name='snapshot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entities', to='sckanner.datasnapshot'),
+        ),
+        migrations.AddIndex(
+            model_name='snapshotentity',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='se_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='snapshotentity',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('synonyms'), name='gin_trgm_ops'), name='se_synonyms_trgm'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='snapshotentity',
+            unique_together={('snapshot', 'entity_id')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0015_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snapshotentity',
+            name='data',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:25
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 500
+
+
+# Frozen copy of sckanner.services.statement_fields.get_statement_content_hash at the time
+# of this migration: sorted keys, no whitespace, SHA-256
+def get_statement_content_hash(data):
+    normalized = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def backfill_content_hash(apps, schema_editor):
+    ConnectivityStatement = apps.get_model('sckanner', 'ConnectivityStatement')
+    batch = []
+    for statement in ConnectivityStatement.objects.only('id', 'data').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        statement.content_hash = get_statement_content_hash(statement.data)
+        batch.append(statement)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            ConnectivityStatement.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    if batch:
+        ConnectivityStatement.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0016_snapshotentity_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0017_connectivitystatement_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='ingestion_duration',
+            field=models.DurationField(blank=True, help_text='Time taken by the ingestion of the statements and artifacts', null=True),
+        ),
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='payload_sizes',
+            field=models.JSONField(blank=True, default=dict, help_text='Byte size of each /knowledge-statements payload by format and encoding, measured at ingestion'),
+        ),
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='statement_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Number of statements, counted at ingestion', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0018_datasnapshot_catalog_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotFacetValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(help_text='Name of the filter the value is an option of', max_length=32)),
+                ('value', models.TextField()),
+                ('label', models.TextField()),
+                ('synonyms', models.TextField(blank=True, default='')),
+                ('statement_count', models.PositiveIntegerField()),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facet_values', to='sckanner.datasnapshot')),
+            ],
+            options={
+                'unique_together': {('snapshot', 'facet', 'value')},
+            },
+        ),
+    ]
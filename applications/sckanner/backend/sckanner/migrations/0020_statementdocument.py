@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+import hashlib
+import json
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+
+BACKFILL_BATCH_SIZE = 500
+
+
+# Frozen copy of sckanner.services.statement_fields.get_statement_content_hash at the time
+# of this migration: sorted keys, no whitespace, SHA-256
+def get_statement_content_hash(data):
+    normalized = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+# Frozen copy of sckanner.services.search.STATEMENT_SEARCH_VECTOR at the time of this migration
+STATEMENT_SEARCH_VECTOR = (
+    SearchVector(
+        KeyTextTransform('curie_id', 'data'),
+        KeyTextTransform('name', KeyTransform('population', 'data')),
+        weight='A',
+        config='english',
+    )
+    + SearchVector(KeyTextTransform('statement_preview', 'data'), weight='B', config='english')
+    + SearchVector(KeyTextTransform('knowledge_statement', 'data'), weight='C', config='english')
+)
+
+
+def backfill_statement_documents(apps, schema_editor):
+    ConnectivityStatement = apps.get_model('sckanner', 'ConnectivityStatement')
+    StatementDocument = apps.get_model('sckanner', 'StatementDocument')
+
+    def save_batch(batch):
+        documents = {}
+        for statement in batch:
+            statement.content_hash = statement.content_hash or get_statement_content_hash(statement.data)
+            documents[statement.content_hash] = statement.data
+        document_ids = dict(
+            StatementDocument.objects.filter(content_hash__in=documents.keys()).values_list('content_hash', 'id')
+        )
+        StatementDocument.objects.bulk_create(
+            [StatementDocument(content_hash=content_hash, data=data) for content_hash, data in documents.items() if content_hash not in document_ids]
+        )
+        document_ids = dict(
+            StatementDocument.objects.filter(content_hash__in=documents.keys()).values_list('content_hash', 'id')
+        )
+        for statement in batch:
+            statement.document_id = document_ids[statement.content_hash]
+        ConnectivityStatement.objects.bulk_update(batch, ['document'])
+
+    batch = []
+    for statement in ConnectivityStatement.objects.only('id', 'data', 'content_hash').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        batch.append(statement)
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            save_batch(batch)
+            batch = []
+    if batch:
+        save_batch(batch)
+    StatementDocument.objects.update(search_vector=STATEMENT_SEARCH_VECTOR)
+    if schema_editor.connection.vendor == 'postgresql':
+        # Check the deferred foreign keys of the updated rows now: pending trigger
+        # events would make the ALTER TABLE of the operations below fail
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0019_snapshotfacetvalue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatementDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the normalized document, see sckanner.services.statement_fields', max_length=64, unique=True)),
+                ('data', models.JSONField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='sd_search_vector_gin')],
+            },
+        ),
+        migrations.AddField(
+            model_name='connectivitystatement',
+            name='document',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='statements', to='sckanner.statementdocument'),
+        ),
+        migrations.RunPython(backfill_statement_documents, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='connectivitystatement',
+            name='document',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='statements', to='sckanner.statementdocument'),
+        ),
+        migrations.RemoveIndex(
+            model_name='connectivitystatement',
+            name='cs_search_vector_gin',
+        ),
+        migrations.RemoveField(
+            model_name='connectivitystatement',
+            name='content_hash',
+        ),
+        migrations.RemoveField(
+            model_name='connectivitystatement',
+            name='data',
+        ),
+        migrations.RemoveField(
+            model_name='connectivitystatement',
+            name='search_vector',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0020_statementdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='base_snapshot',
+            field=models.ForeignKey(blank=True, help_text='Snapshot of the same source whose unchanged statements were reused at ingestion', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sckanner.datasnapshot'),
+        ),
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='changed_statement_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Number of statements new or modified since the base snapshot', null=True),
+        ),
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='removed_statement_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Number of statements of the base snapshot no longer present', null=True),
+        ),
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='reused_statement_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Number of statements copied unchanged from the base snapshot', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sckanner', '0021_datasnapshot_incremental_ingestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasnapshot',
+            name='payload_hashes',
+            field=models.JSONField(blank=True, default=dict, help_text='SHA-256 of each /knowledge-statements payload file by format and encoding, the ETag it is served with'),
+        ),
+    ]
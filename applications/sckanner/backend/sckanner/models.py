@@ -1,4 +1,8 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models, transaction
+from django.db.models.functions import Upper
 from treebeard.mp_tree import MP_Node
 from django.db.models import Q
 from django.core.exceptions import ValidationError
@@ -63,6 +67,16 @@ class DataSnapshot(models.Model):
     message = models.TextField(null=True, blank=True)
     snapshot_visible = models.BooleanField(default=True, db_index=True, help_text="Whether this snapshot is visible to users")
     default = models.BooleanField(default=False, db_index=True, help_text="Whether this is the default snapshot")
+    content_hash = models.CharField(max_length=64, null=True, blank=True, help_text="SHA-256 of the snapshot payload and A-B-via-C file, computed at ingestion")
+    statement_count = models.PositiveIntegerField(null=True, blank=True, help_text="Number of statements, counted at ingestion")
+    payload_sizes = models.JSONField(default=dict, blank=True, help_text="Byte size of each /knowledge-statements payload by format and encoding, measured at ingestion")
+    payload_hashes = models.JSONField(default=dict, blank=True, help_text="SHA-256 of each /knowledge-statements payload file by format and encoding, the ETag it is served with")
+    ingestion_duration = models.DurationField(null=True, blank=True, help_text="Time taken by the ingestion of the statements and artifacts")
+    # Incremental ingestion, see sckanner.services.ingestion.ingest_datasnapshot_connectivity_statements
+    base_snapshot = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="+", help_text="Snapshot of the same source whose unchanged statements were reused at ingestion")
+    reused_statement_count = models.PositiveIntegerField(null=True, blank=True, help_text="Number of statements copied unchanged from the base snapshot")
+    changed_statement_count = models.PositiveIntegerField(null=True, blank=True, help_text="Number of statements new or modified since the base snapshot")
+    removed_statement_count = models.PositiveIntegerField(null=True, blank=True, help_text="Number of statements of the base snapshot no longer present")
 
     objects = DataSnapshotManager()
 
@@ -87,17 +101,60 @@ class DataSnapshot(models.Model):
         unique_together = ('source', 'version')
 
 
+class StatementDocument(models.Model):
+    """
+    JSON document of a statement, stored once whatever the number of snapshots
+    containing it: statements of snapshots reference documents by content hash.
+    """
+    content_hash = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the normalized document, see sckanner.services.statement_fields")
+    data = models.JSONField()  # Stores the knowledge statement as JSON
+
+    # Labels and text of the statement, set at ingestion, see sckanner.services.search
+    search_vector = SearchVectorField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='sd_search_vector_gin'),
+        ]
+
+    def __str__(self):
+        return f"StatementDocument {self.content_hash}"
+
+
 class ConnectivityStatement(models.Model):
     id = models.AutoField(primary_key=True, db_index=True)
     reference_uri = models.URLField(null=True, blank=True, db_index=True)
-    data = models.JSONField()  # Stores the knowledge statement as JSON
     snapshot = models.ForeignKey(DataSnapshot, on_delete=models.CASCADE)
+    # The statement as JSON, shared with the snapshots having the same statement, see sckanner.services.statement_documents
+    document = models.ForeignKey(StatementDocument, on_delete=models.PROTECT, related_name="statements")
+
+    # Values extracted from data at ingestion to filter statements, see sckanner.services.statement_fields
+    phenotypes = ArrayField(models.TextField(), default=list, blank=True)
+    apinatomy = models.TextField(default="", blank=True, db_index=True)
+    species_ids = ArrayField(models.TextField(), default=list, blank=True)
+    origin_ids = ArrayField(models.TextField(), default=list, blank=True)
+    via_ids = ArrayField(models.TextField(), default=list, blank=True)
+    destination_ids = ArrayField(models.TextField(), default=list, blank=True)
+
+    # Forward connection graph of the snapshot, resolved at ingestion, see sckanner.services.forward_connections
+    forward_ids = ArrayField(models.IntegerField(), default=list, blank=True)
+    reverse_ids = ArrayField(models.IntegerField(), default=list, blank=True)
+    forward_paths = models.JSONField(default=list, blank=True)
 
     class Meta:
         # TODO - validation/confirmation needed: make sure that -
         # connectivity statement - reference_uri is unique for a given source.
         # It can be same for different sources.
         unique_together = ('reference_uri', 'snapshot')
+        indexes = [
+            GinIndex(fields=['phenotypes'], name='cs_phenotypes_gin'),
+            GinIndex(fields=['species_ids'], name='cs_species_ids_gin'),
+            GinIndex(fields=['origin_ids'], name='cs_origin_ids_gin'),
+            GinIndex(fields=['via_ids'], name='cs_via_ids_gin'),
+            GinIndex(fields=['destination_ids'], name='cs_destination_ids_gin'),
+            # icontains filters compare UPPER(column)
+            GinIndex(OpClass(Upper('reference_uri'), name='gin_trgm_ops'), name='cs_reference_uri_trgm'),
+        ]
 
     def __str__(self):
         # conditionally add to the Connectiyt string
@@ -105,3 +162,63 @@ class ConnectivityStatement(models.Model):
         if self.snapshot:
             cs_str += f" - source: {self.snapshot.source} - version: {self.snapshot.version}" if self.snapshot.version else f" - source: {self.snapshot.source}"
         return cs_str
+
+
+class SnapshotEntity(models.Model):
+    """
+    Anatomical entity (origin, via or destination) of the statements of a snapshot, set at ingestion.
+    """
+    snapshot = models.ForeignKey(DataSnapshot, on_delete=models.CASCADE, related_name="entities")
+    entity_id = models.TextField(help_text="Ontology URI, or 'region URI (layer URI)' for region/layer entities")
+    name = models.TextField()
+    synonyms = models.TextField(default="", blank=True)
+    # The entity object as found in the statements, see sckanner.services.snapshot_entities
+    data = models.JSONField(default=dict)
+
+    class Meta:
+        unique_together = ('snapshot', 'entity_id')
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='se_name_trgm'),
+            GinIndex(OpClass(Upper('synonyms'), name='gin_trgm_ops'), name='se_synonyms_trgm'),
+        ]
+
+    def __str__(self):
+        return f"SnapshotEntity {self.name} - {self.snapshot_id}"
+
+
+class SnapshotFacetValue(models.Model):
+    """
+    Value of an explorer filter among the statements of a snapshot, with the number
+    of statements having it, set at ingestion, see sckanner.services.facets.
+    """
+    snapshot = models.ForeignKey(DataSnapshot, on_delete=models.CASCADE, related_name="facet_values")
+    facet = models.CharField(max_length=32, help_text="Name of the filter the value is an option of")
+    value = models.TextField()
+    label = models.TextField()
+    synonyms = models.TextField(default="", blank=True)
+    statement_count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('snapshot', 'facet', 'value')
+
+    def __str__(self):
+        return f"SnapshotFacetValue {self.facet} {self.value} - {self.snapshot_id}"
+
+
+class HierarchyNode(MP_Node):
+    """
+    Node of the anatomical hierarchy of a snapshot (the y axis of the explorer),
+    materialized at ingestion from the A-B-via-C file, see sckanner.services.hierarchy.
+    Each snapshot has its own tree, under a root node with an empty node_id.
+    """
+    snapshot = models.ForeignKey(DataSnapshot, on_delete=models.CASCADE, related_name="hierarchy_nodes")
+    node_id = models.TextField(help_text="Ids of the node and its ancestors joined with '#', as in the explorer")
+    name = models.TextField()
+    # {end organ IRI: {sub organ IRI: [statement reference URIs]}} for leaves
+    connection_details = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('snapshot', 'node_id')
+
+    def __str__(self):
+        return f"HierarchyNode {self.node_id} - {self.snapshot_id}"
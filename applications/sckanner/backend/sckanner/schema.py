@@ -1,5 +1,5 @@
-from ninja import Schema
-from typing import Optional
+from ninja import Field, Schema
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from ninja.orm import create_schema
 
@@ -12,3 +12,137 @@ class DataSnapshotSchema(Schema):
     version: str
     a_b_via_c_json_file: str
     default: bool
+
+
+class DataSnapshotCatalogSchema(DataSnapshotSchema):
+    content_hash: Optional[str]
+    statement_count: Optional[int]
+    # Bytes of each /knowledge-statements payload, by format and encoding
+    payload_sizes: Dict[str, Dict[str, int]]
+    # Seconds
+    ingestion_duration: Optional[float]
+
+
+class KnowledgeStatementPageSchema(Schema):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[int]
+
+
+class KnowledgeStatementLookupSchema(Schema):
+    datasnapshot_id: int
+    reference_uris: List[str]
+    # Top-level statement fields to return, the whole statements when empty
+    fields: List[str] = Field(default_factory=list)
+
+
+class KnowledgeStatementLookupResultSchema(Schema):
+    items: List[Dict[str, Any]]
+    # Requested reference URIs without a statement in the snapshot
+    missing: List[str]
+
+
+class KnowledgeStatementFiltersSchema(Schema):
+    """
+    Explorer filters, each one a list of ids: phenotype/circuit type/projection names,
+    apiNATOMY models, species, entity or hierarchy node ids and end organ IRIs.
+    """
+    phenotype: List[str] = Field(default_factory=list)
+    apinatomy: List[str] = Field(default_factory=list)
+    species: List[str] = Field(default_factory=list)
+    origin: List[str] = Field(default_factory=list)
+    via: List[str] = Field(default_factory=list)
+    entity: List[str] = Field(default_factory=list)
+    end_organ: List[str] = Field(default_factory=list)
+
+
+class SummaryHeatmapFiltersSchema(KnowledgeStatementFiltersSchema):
+    """
+    Explorer filters plus the nerve filter of the summary view (via entity ids).
+    """
+    nerve: List[str] = Field(default_factory=list)
+
+
+class HeatmapColumnSchema(Schema):
+    id: str
+    name: str
+
+
+class HeatmapRowSchema(Schema):
+    id: str
+    name: str
+    counts: List[int]
+
+
+class HeatmapSchema(Schema):
+    columns: List[HeatmapColumnSchema]
+    rows: List[HeatmapRowSchema]
+
+
+class SummaryHeatmapRowSchema(Schema):
+    id: str
+    name: str
+    # Statement counts per column and phenotype
+    counts: List[List[int]]
+
+
+class SummaryHeatmapSchema(Schema):
+    columns: List[HeatmapColumnSchema]
+    phenotypes: List[str]
+    rows: List[SummaryHeatmapRowSchema]
+
+
+class HierarchySchema(Schema):
+    ids: List[str]
+    names: List[str]
+    parents: List[int]
+
+
+class ForwardPathsSchema(Schema):
+    paths: List[List[int]]
+    reverse_ids: List[int]
+    reference_uris: Dict[int, str]
+
+
+class StatementSearchResultSchema(Schema):
+    id: int
+    reference_uri: Optional[str]
+    label: Optional[str]
+    rank: float
+
+
+class StatementSearchSchema(Schema):
+    items: List[StatementSearchResultSchema]
+    next_offset: Optional[int]
+
+
+class EntitySearchResultSchema(Schema):
+    entity_id: str
+    name: str
+    synonyms: str
+    rank: float
+
+
+class EntitySearchSchema(Schema):
+    items: List[EntitySearchResultSchema]
+    next_offset: Optional[int]
+
+
+class StatementChangeSchema(Schema):
+    reference_uri: str
+    fields: List[str]
+
+
+class SnapshotDiffSchema(Schema):
+    base_id: int
+    other_id: int
+    added: List[str]
+    removed: List[str]
+    modified: List[StatementChangeSchema]
+
+
+class FacetValueSchema(Schema):
+    id: str
+    label: str
+    synonyms: str
+    # Statements having the value, among the statements matching the filters if any
+    count: int
@@ -0,0 +1,136 @@
+"""
+Binary /knowledge-statements payloads, written once per snapshot at ingestion:
+
+- MessagePack: the statements list, as in the JSON payload, served to clients accepting
+  application/msgpack.
+- Arrow IPC stream: a columnar table of the fields the explorer displays and filters on, served
+  as its own format (format=arrow), not as an encoding of the statements: other fields, such as
+  sex, journey, entities_journey, population or statement_alerts, are left out. Its columns are
+  ARROW_STATEMENT_FIELDS: id is the statement's id in the snapshot, phenotype the phenotype name,
+  species the species ontology URIs, forward_connection and provenances the reference URIs and
+  URIs, and entities are referenced by position in the snapshot entity dictionary (see
+  sckanner.services.snapshot_entities, which has the first copy of each entity), which is
+  stored as JSON in the "entities" schema metadata.
+"""
+import io
+
+import msgpack
+import pyarrow as pa
+
+from sckanner.services.knowledge_statements import get_snapshot_statements
+from sckanner.services.snapshot_entities import get_snapshot_entities_json
+from sckanner.services.statement_fields import get_anatomical_entity_id
+
+BINARY_PAYLOAD_BATCH_SIZE = 1000
+
+ENTITY_REFERENCES = pa.list_(pa.int32())
+PATH_ITEM = pa.struct(
+    [
+        ("type", pa.string()),
+        ("anatomical_entities", ENTITY_REFERENCES),
+        ("from_entities", ENTITY_REFERENCES),
+    ]
+)
+ARROW_STATEMENT_FIELDS = [
+    ("id", pa.int64()),
+    ("reference_uri", pa.string()),
+    ("phenotype", pa.string()),
+    ("circuit_type", pa.string()),
+    ("projection", pa.string()),
+    ("laterality", pa.string()),
+    ("apinatomy_model", pa.string()),
+    ("knowledge_statement", pa.string()),
+    ("statement_preview", pa.string()),
+    ("species", pa.list_(pa.string())),
+    ("origins", ENTITY_REFERENCES),
+    ("vias", pa.list_(PATH_ITEM)),
+    ("destinations", pa.list_(PATH_ITEM)),
+    ("forward_connection", pa.list_(pa.string())),
+    ("provenances", pa.list_(pa.string())),
+]
+
+
+def iter_msgpack_payload(datasnapshot_id: int, batch_size: int = BINARY_PAYLOAD_BATCH_SIZE):
+    statements = get_snapshot_statements(datasnapshot_id)
+    packer = msgpack.Packer()
+    yield packer.pack_array_header(statements.count())
+    buffer = []
+    for data in statements.values_list("document__data", flat=True).iterator(chunk_size=batch_size):
+        buffer.append(packer.pack(data))
+        if len(buffer) >= batch_size:
+            yield b"".join(buffer)
+            buffer = []
+    if buffer:
+        yield b"".join(buffer)
+
+
+def iter_arrow_payload(datasnapshot_id: int, batch_size: int = BINARY_PAYLOAD_BATCH_SIZE):
+    entity_positions = {}
+    entities_json = []
+    for entity in get_snapshot_entities_json(datasnapshot_id).iterator(chunk_size=batch_size):
+        entity_positions[entity["entity_id"]] = len(entity_positions)
+        entities_json.append(entity["data_json"])
+    schema = pa.schema(ARROW_STATEMENT_FIELDS, metadata={"entities": f"[{','.join(entities_json)}]"})
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        rows = []
+        statements = get_snapshot_statements(datasnapshot_id).values_list("id", "document__data")
+        for statement_id, data in statements.iterator(chunk_size=batch_size):
+            rows.append(get_arrow_row(statement_id, data, entity_positions))
+            if len(rows) >= batch_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+                rows = []
+                yield _drain(sink)
+        if rows:
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+    yield _drain(sink)
+
+
+def get_arrow_row(statement_id: int, data: dict, entity_positions: dict) -> dict:
+    def references(entities):
+        positions = (entity_positions.get(get_anatomical_entity_id(entity)) for entity in entities or [])
+        return [position for position in positions if position is not None]
+
+    def path_items(items):
+        return [
+            {
+                "type": item.get("type"),
+                "anatomical_entities": references(item.get("anatomical_entities")),
+                "from_entities": references(item.get("from_entities")),
+            }
+            for item in items or []
+        ]
+
+    return {
+        "id": statement_id,
+        "reference_uri": data.get("reference_uri"),
+        "phenotype": (data.get("phenotype") or {}).get("name"),
+        "circuit_type": data.get("circuit_type"),
+        "projection": data.get("projection"),
+        "laterality": data.get("laterality"),
+        "apinatomy_model": data.get("apinatomy_model"),
+        "knowledge_statement": data.get("knowledge_statement"),
+        "statement_preview": data.get("statement_preview"),
+        "species": [species.get("ontology_uri") for species in data.get("species") or []],
+        "origins": references(data.get("origins")),
+        "vias": path_items(data.get("vias")),
+        "destinations": path_items(data.get("destinations")),
+        "forward_connection": [
+            connection.get("reference_uri")
+            for connection in data.get("forward_connection") or []
+            if isinstance(connection, dict)
+        ],
+        "provenances": [
+            provenance.get("uri") if isinstance(provenance, dict) else provenance
+            for provenance in data.get("provenances") or []
+        ],
+    }
+
+
+def _drain(sink) -> bytes:
+    # Bytes written to the stream since the last call
+    written = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return written
@@ -0,0 +1,183 @@
+"""
+Bitmap index of the statement filter columns of a snapshot: one bitmap of the
+statements (ordered by id) for each (column, value) pair, so any combination of
+the explorer filters resolves to AND and OR of bitmaps, and counts to popcounts.
+Built once at ingestion and memory-mapped by the workers, which share its pages.
+"""
+import os
+
+import numpy as np
+
+from sckanner.models import ConnectivityStatement, DataSnapshot
+from sckanner.services.datasnapshot import get_snapshot_artifacts_directory
+from sckanner.services.hierarchy import get_snapshot_hierarchy
+from sckanner.services.ingestion.logger_service import logger
+from sckanner.services.snapshot_cache import snapshot_cache
+from sckanner.services.statement_filters import STATEMENT_FILTER_COLUMNS, get_statement_filter_conditions
+
+BITMAP_INDEX_BATCH_SIZE = 2000
+# The bitmaps, memory-mapped, and the statement ids and (column, value) pairs of the rows
+BITMAP_INDEX_BITS_FILENAME = "bitmap-index.npy"
+BITMAP_INDEX_KEYS_FILENAME = "bitmap-index-keys.npz"
+
+# Set bits of each byte value
+POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+class StatementBitmapIndex:
+    """
+    bits: uint8 matrix with one row per (column, value) pair, each row being the
+    bitmap of the statements holding value in column, packed little-endian:
+    statement s is bit s % 8 of byte s // 8. A last row of zeros stands for absent pairs.
+    """
+
+    def __init__(self, statement_ids, columns, values, bits):
+        self.statement_ids = statement_ids
+        self.columns = columns
+        self.values = values
+        self.bits = bits
+        self.row_index = {(column, value): row for row, (column, value) in enumerate(zip(columns, values))}
+        self.empty_row = len(columns)
+
+    @classmethod
+    def from_snapshot(cls, datasnapshot_id: int) -> "StatementBitmapIndex":
+        statements = (
+            ConnectivityStatement.objects.filter(snapshot_id=datasnapshot_id)
+            .order_by("id")
+            .values_list("id", *STATEMENT_FILTER_COLUMNS)
+        )
+        statement_ids = []
+        row_index = {}
+        rows, positions = [], []
+        for statement in statements.iterator(chunk_size=BITMAP_INDEX_BATCH_SIZE):
+            position = len(statement_ids)
+            statement_ids.append(statement[0])
+            for column, values in zip(STATEMENT_FILTER_COLUMNS, statement[1:]):
+                # apinatomy is the only column holding a single value
+                for value in ([values] if isinstance(values, str) else values) if values else []:
+                    rows.append(row_index.setdefault((column, value), len(row_index)))
+                    positions.append(position)
+
+        bits = np.zeros((len(row_index) + 1, (len(statement_ids) + 7) // 8), dtype=np.uint8)
+        rows = np.array(rows, dtype=np.int64)
+        positions = np.array(positions, dtype=np.int64)
+        np.bitwise_or.at(bits, (rows, positions // 8), np.left_shift(1, positions % 8).astype(np.uint8))
+        return cls(
+            np.array(statement_ids, dtype=np.int64),
+            np.array([column for column, _ in row_index], dtype=np.str_),
+            np.array([value for _, value in row_index], dtype=np.str_),
+            bits,
+        )
+
+    @classmethod
+    def load(cls, bits_path: str, keys_path: str) -> "StatementBitmapIndex":
+        with np.load(keys_path, allow_pickle=False) as keys:
+            return cls(keys["statement_ids"], keys["columns"], keys["values"], np.load(bits_path, mmap_mode="r"))
+
+    def save(self, bits_path: str, keys_path: str):
+        with open(bits_path, "wb") as bits_file:
+            np.save(bits_file, self.bits)
+        with open(keys_path, "wb") as keys_file:
+            np.savez(keys_file, statement_ids=self.statement_ids, columns=self.columns, values=self.values)
+
+    @property
+    def nbytes(self) -> int:
+        # Memory-mapped bitmaps live in the page cache, shared by the workers
+        arrays = [self.statement_ids, self.columns, self.values]
+        if not isinstance(self.bits, np.memmap):
+            arrays.append(self.bits)
+        return sum(array.nbytes for array in arrays)
+
+    def get_rows(self, column: str, values: list) -> list:
+        return [self.row_index[(column, value)] for value in values if (column, value) in self.row_index]
+
+    def all_statements(self) -> np.ndarray:
+        mask = np.full(self.bits.shape[1], 0xFF, dtype=np.uint8)
+        if len(self.statement_ids) % 8:
+            mask[-1] = (1 << (len(self.statement_ids) % 8)) - 1
+        return mask
+
+    def get_statement_mask(self, conditions: list) -> np.ndarray:
+        """
+        Bitmap of the statements matching filter conditions,
+        see sckanner.services.statement_filters.get_statement_filter_conditions.
+        """
+        mask = self.all_statements()
+        for condition in conditions:
+            rows = [row for column, values in condition for row in self.get_rows(column, values)]
+            mask &= np.bitwise_or.reduce(self.bits[rows + [self.empty_row]], axis=0)
+        return mask
+
+    def count_statements(self, row_groups: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+        """
+        Number of statements in the union of the rows of each group, within mask if given.
+        row_groups holds one row index per column of a group, empty_row for none.
+        """
+        if len(row_groups) == 0:
+            return np.zeros(0, dtype=np.int64)
+        bits = np.bitwise_or.reduce(self.bits[row_groups], axis=1)
+        if mask is not None:
+            bits &= mask
+        return POPCOUNT[bits].sum(axis=1, dtype=np.int64)
+
+    def get_statement_selection(self, mask: np.ndarray) -> np.ndarray:
+        """
+        mask unpacked: one boolean per statement, in id order.
+        """
+        return np.unpackbits(mask, bitorder="little", count=len(self.statement_ids)).astype(np.bool_)
+
+    def get_statement_ids(self, mask: np.ndarray) -> np.ndarray:
+        return self.statement_ids[self.get_statement_selection(mask)]
+
+
+def get_bitmap_index_paths(datasnapshot_id: int) -> tuple:
+    directory = get_snapshot_artifacts_directory(datasnapshot_id)
+    return os.path.join(directory, BITMAP_INDEX_BITS_FILENAME), os.path.join(directory, BITMAP_INDEX_KEYS_FILENAME)
+
+
+def write_bitmap_index(snapshot: DataSnapshot) -> StatementBitmapIndex:
+    os.makedirs(get_snapshot_artifacts_directory(snapshot.id), exist_ok=True)
+    bits_path, keys_path = get_bitmap_index_paths(snapshot.id)
+    index = StatementBitmapIndex.from_snapshot(snapshot.id)
+    tmp_paths = (f"{bits_path}.tmp", f"{keys_path}.tmp")
+    try:
+        index.save(*tmp_paths)
+        os.replace(tmp_paths[0], bits_path)
+        os.replace(tmp_paths[1], keys_path)
+    finally:
+        for tmp_path in tmp_paths:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    logger.info(
+        f"Bitmap index written for snapshot {snapshot.id}: {len(index.columns)} values, "
+        f"{len(index.statement_ids)} statements, {index.bits.nbytes} bytes"
+    )
+    return index
+
+
+def get_snapshot_bitmap_index(snapshot: DataSnapshot) -> StatementBitmapIndex:
+    """
+    The bitmap index of a snapshot, kept in the worker's snapshot cache.
+    Snapshots ingested before the index existed get it built on the fly.
+    """
+    bits_path, keys_path = get_bitmap_index_paths(snapshot.id)
+    return snapshot_cache.get_or_set(
+        (snapshot.id, snapshot.content_hash, "bitmap_index"),
+        lambda: (
+            StatementBitmapIndex.load(bits_path, keys_path)
+            if os.path.exists(bits_path) and os.path.exists(keys_path)
+            else StatementBitmapIndex.from_snapshot(snapshot.id)
+        ),
+        size_of=lambda index: index.nbytes,
+    )
+
+
+def get_filtered_statement_mask(snapshot: DataSnapshot, filters, extra_conditions: list = ()) -> tuple:
+    """
+    The bitmap index of a snapshot and the bitmap of its statements matching
+    the explorer filters and extra_conditions.
+    """
+    hierarchy = get_snapshot_hierarchy(snapshot) if filters.end_organ else None
+    index = get_snapshot_bitmap_index(snapshot)
+    conditions = get_statement_filter_conditions(filters, snapshot.id, hierarchy) + list(extra_conditions)
+    return index, index.get_statement_mask(conditions)
@@ -1,6 +1,18 @@
+import os
+
+from django.conf import settings
+
+
 def filter_datasnapshot_by_if_a_b_via_c_json_file_exists(datasnapshots):
     return [
         snapshot
         for snapshot in datasnapshots
         if snapshot.a_b_via_c_json_file and snapshot.a_b_via_c_json_file.url
     ]
+
+
+def get_snapshot_artifacts_directory(datasnapshot_id: int) -> str:
+    """
+    Directory on the persistent volume holding the files derived from a snapshot at ingestion.
+    """
+    return os.path.join(settings.MEDIA_ROOT, "snapshots", str(datasnapshot_id))
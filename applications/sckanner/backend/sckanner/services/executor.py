@@ -0,0 +1,20 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+DEFAULT_API_EXECUTOR_MAX_WORKERS = 4
+
+# Bounded pool for the blocking file reads and CPU-bound encoding of the async endpoints,
+# so that they never wait for (or exhaust) the threads serving synchronous code
+api_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "API_EXECUTOR_MAX_WORKERS", DEFAULT_API_EXECUTOR_MAX_WORKERS),
+    thread_name_prefix="sckanner-api",
+)
+
+
+async def run_in_api_executor(func, *args):
+    """
+    Run func(*args) in the API executor. func must not use the database.
+    """
+    return await asyncio.get_running_loop().run_in_executor(api_executor, func, *args)
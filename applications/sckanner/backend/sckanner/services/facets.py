@@ -0,0 +1,114 @@
+"""
+Options of the explorer filters (filterValuesService.ts in the frontend) with the number
+of statements having each of them, stored per snapshot at ingestion. Counts under a filter
+selection come from the bitmap index, see sckanner.services.bitmap_index.
+"""
+from django.db import transaction
+import numpy as np
+
+from sckanner.models import DataSnapshot, SnapshotEntity, SnapshotFacetValue
+from sckanner.services.bitmap_index import StatementBitmapIndex, get_snapshot_bitmap_index
+from sckanner.services.ingestion.logger_service import logger
+from sckanner.services.knowledge_statements import get_snapshot_statements
+
+FACETS_BATCH_SIZE = 1000
+
+# Facet (named as its filter) -> statement filter columns holding its values
+FACET_COLUMNS = {
+    "phenotype": ("phenotypes",),
+    "apinatomy": ("apinatomy",),
+    "species": ("species_ids",),
+    "origin": ("origin_ids",),
+    "via": ("via_ids",),
+    "entity": ("origin_ids", "via_ids", "destination_ids"),
+}
+
+
+@transaction.atomic
+def build_snapshot_facets(snapshot: DataSnapshot, index: StatementBitmapIndex = None):
+    """
+    Store the facet values of a snapshot with their statement counts.
+    Entities are labelled from the snapshot entity dictionary, built beforehand.
+    """
+    SnapshotFacetValue.objects.filter(snapshot=snapshot).delete()
+    index = index or StatementBitmapIndex.from_snapshot(snapshot.id)
+    entities = {
+        entity_id: (name, synonyms)
+        for entity_id, name, synonyms in SnapshotEntity.objects.filter(snapshot=snapshot).values_list(
+            "entity_id", "name", "synonyms"
+        )
+    }
+    species_names = get_species_names(snapshot.id)
+
+    facet_values = []
+    for facet, columns in FACET_COLUMNS.items():
+        values = list(dict.fromkeys(value for column, value in zip(index.columns, index.values) if column in columns))
+        if facet in ("origin", "via", "entity"):
+            # Destination columns also hold the region and layer URIs of region/layer entities
+            values = [value for value in values if value in entities]
+        counts = index.count_statements(get_facet_row_groups(index, facet, values))
+        for value, count in zip(values, counts.tolist()):
+            if facet in ("phenotype", "apinatomy"):
+                label, synonyms = value.lower(), ""
+            elif facet == "species":
+                label, synonyms = species_names.get(value, value), ""
+            else:
+                label, synonyms = entities[value]
+            facet_values.append(
+                SnapshotFacetValue(
+                    snapshot=snapshot,
+                    facet=facet,
+                    value=value,
+                    label=label,
+                    synonyms=synonyms,
+                    statement_count=count,
+                )
+            )
+    SnapshotFacetValue.objects.bulk_create(facet_values, batch_size=FACETS_BATCH_SIZE)
+    logger.info(f"Facet values of snapshot {snapshot.id} stored: {len(facet_values)}")
+
+
+def get_species_names(datasnapshot_id: int) -> dict:
+    names = {}
+    for species in get_snapshot_statements(datasnapshot_id).values_list("document__data__species", flat=True).iterator(
+        chunk_size=FACETS_BATCH_SIZE
+    ):
+        for item in species or []:
+            names.setdefault(item.get("ontology_uri"), item.get("name") or item.get("ontology_uri"))
+    return names
+
+
+def get_facet_row_groups(index: StatementBitmapIndex, facet: str, values: list) -> np.ndarray:
+    columns = FACET_COLUMNS[facet]
+    return np.array(
+        [[index.row_index.get((column, value), index.empty_row) for column in columns] for value in values],
+        dtype=np.int64,
+    ).reshape(len(values), len(columns))
+
+
+def get_snapshot_facets(snapshot: DataSnapshot, mask: np.ndarray = None) -> dict:
+    """
+    {facet: [{"id", "label", "synonyms", "count"}, ...]} sorted by label. With a statement
+    bitmap (see sckanner.services.bitmap_index), counts are those of its statements.
+    """
+    facets = {facet: [] for facet in FACET_COLUMNS}
+    for facet_value in (
+        SnapshotFacetValue.objects.filter(snapshot=snapshot)
+        .order_by("facet", "label", "value")
+        .values("facet", "value", "label", "synonyms", "statement_count")
+    ):
+        facets[facet_value["facet"]].append(
+            {
+                "id": facet_value["value"],
+                "label": facet_value["label"],
+                "synonyms": facet_value["synonyms"],
+                "count": facet_value["statement_count"],
+            }
+        )
+    if mask is not None:
+        index = get_snapshot_bitmap_index(snapshot)
+        for facet, values in facets.items():
+            counts = index.count_statements(get_facet_row_groups(index, facet, [value["id"] for value in values]), mask)
+            for value, count in zip(values, counts.tolist()):
+                value["count"] = count
+    return facets
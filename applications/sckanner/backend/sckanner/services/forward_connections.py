@@ -0,0 +1,108 @@
+"""
+Forward connection graph of a snapshot: the forward_connection references of each statement
+resolved into ConnectivityStatement ids at ingestion, like traceForwardConnectionPaths and
+mapForwardConnections in frontend/src/services/heatmapService.ts do in the browser.
+"""
+from itertools import islice
+
+from django.db import transaction
+from django.db.models.fields.json import KeyTransform
+
+from sckanner.models import ConnectivityStatement, DataSnapshot
+from sckanner.services.ingestion.logger_service import logger
+
+FORWARD_PATHS_MAX_DEPTH = 16
+FORWARD_PATHS_MAX_COUNT = 1000
+FORWARD_GRAPH_BATCH_SIZE = 500
+
+
+def iter_forward_paths(start_id: int, forward_ids: dict, max_depth: int = FORWARD_PATHS_MAX_DEPTH):
+    """
+    Paths (lists of statement ids) from start_id to the statements without forward
+    connections, at most max_depth connections long. Branches looping back to a
+    statement of the path are dropped.
+    """
+    path = [start_id]
+    on_path = {start_id}
+    pending = [iter(forward_ids.get(start_id, ()))]
+    while pending:
+        next_id = next(pending[-1], None)
+        if next_id is None:
+            pending.pop()
+            on_path.discard(path.pop())
+            continue
+        if next_id in on_path:
+            continue
+        path.append(next_id)
+        if not forward_ids.get(next_id) or len(path) > max_depth:
+            yield list(path)
+            path.pop()
+        else:
+            on_path.add(next_id)
+            pending.append(iter(forward_ids[next_id]))
+
+
+def get_forward_reference_uris(forward_connection) -> list:
+    return [
+        connection.get("reference_uri")
+        for connection in forward_connection or []
+        if isinstance(connection, dict) and connection.get("reference_uri")
+    ]
+
+
+@transaction.atomic
+def build_forward_graph(snapshot: DataSnapshot):
+    """
+    Store the forward and reverse edges of the statements of a snapshot, and their
+    forward paths up to FORWARD_PATHS_MAX_DEPTH connections.
+    References to statements missing from the snapshot are dropped.
+    """
+    rows = list(
+        ConnectivityStatement.objects.filter(snapshot=snapshot)
+        .annotate(forward_connection=KeyTransform("forward_connection", "document__data"))
+        .order_by("id")
+        .values_list("id", "reference_uri", "forward_connection")
+    )
+    ids_by_reference_uri = {reference_uri: statement_id for statement_id, reference_uri, _ in rows}
+
+    forward_ids = {}
+    reverse_ids = {statement_id: [] for statement_id, _, _ in rows}
+    for statement_id, _, forward_connection in rows:
+        targets = [
+            ids_by_reference_uri[reference_uri]
+            for reference_uri in get_forward_reference_uris(forward_connection)
+            if reference_uri in ids_by_reference_uri
+        ]
+        forward_ids[statement_id] = list(dict.fromkeys(targets))
+        for target_id in forward_ids[statement_id]:
+            reverse_ids[target_id].append(statement_id)
+
+    batch = []
+    edge_count = 0
+    for statement_id, _, _ in rows:
+        edge_count += len(forward_ids[statement_id])
+        paths = list(islice(iter_forward_paths(statement_id, forward_ids), FORWARD_PATHS_MAX_COUNT)) if forward_ids[statement_id] else []
+        if len(paths) == FORWARD_PATHS_MAX_COUNT:
+            logger.warning(f"Forward paths of statement {statement_id} truncated to {FORWARD_PATHS_MAX_COUNT}")
+        batch.append(
+            ConnectivityStatement(
+                id=statement_id,
+                forward_ids=forward_ids[statement_id],
+                reverse_ids=reverse_ids[statement_id],
+                forward_paths=paths,
+            )
+        )
+        if len(batch) >= FORWARD_GRAPH_BATCH_SIZE:
+            ConnectivityStatement.objects.bulk_update(batch, ["forward_ids", "reverse_ids", "forward_paths"])
+            batch = []
+    if batch:
+        ConnectivityStatement.objects.bulk_update(batch, ["forward_ids", "reverse_ids", "forward_paths"])
+    logger.info(f"Forward connection graph of snapshot {snapshot.id}: {len(rows)} statements, {edge_count} edges")
+
+
+def get_forward_paths(statement: ConnectivityStatement, depth: int = FORWARD_PATHS_MAX_DEPTH) -> list:
+    """
+    The stored forward paths of a statement, cut to depth connections.
+    """
+    paths = (tuple(path[: depth + 1]) for path in statement.forward_paths)
+    return [list(path) for path in dict.fromkeys(paths)]
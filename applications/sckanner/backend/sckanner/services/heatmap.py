@@ -0,0 +1,246 @@
+"""
+Heatmap of the explorer (hierarchy nodes x end organs, unique statements per cell),
+computed from a sparse incidence matrix built once per snapshot at ingestion,
+like calculateConnections and getHeatmapData in frontend/src/services/heatmapService.ts.
+"""
+import os
+
+import numpy as np
+from scipy import sparse
+
+from sckanner.models import ConnectivityStatement, DataSnapshot
+from sckanner.services.datasnapshot import get_snapshot_artifacts_directory
+from sckanner.services.hierarchy import SnapshotHierarchy, ROOTS, get_snapshot_hierarchy
+from sckanner.services.ingestion.logger_service import logger
+from sckanner.services.snapshot_cache import snapshot_cache
+
+HEATMAP_MATRIX_FILENAME = "heatmap.npz"
+
+
+class HeatmapMatrix:
+    """
+    incidence: boolean CSR matrix, one row per hierarchy leaf and one column per
+    (column, statement) pair, column c and statement s being at c * len(statements) + s.
+    Columns are the (end organ IRI, sub organ IRI) pairs of the leaves' connection details.
+    """
+
+    def __init__(self, leaves, column_organs, column_sub_organs, statements, incidence):
+        self.leaves = leaves
+        self.column_organs = column_organs
+        self.column_sub_organs = column_sub_organs
+        self.statements = statements
+        self.incidence = incidence
+        self.leaf_index = {leaf: index for index, leaf in enumerate(leaves)}
+        self.statement_index = {statement: index for index, statement in enumerate(statements)}
+
+    @classmethod
+    def from_hierarchy(cls, hierarchy: SnapshotHierarchy, statements: list) -> "HeatmapMatrix":
+        statement_index = {statement: index for index, statement in enumerate(statements)}
+        leaves = []
+        columns = {}
+        rows, cols = [], []
+        for path, node in hierarchy.nodes.items():
+            if node["children"] or not node["connection_details"]:
+                continue
+            leaf = len(leaves)
+            leaves.append(path)
+            for organ_iri, sub_organs in node["connection_details"].items():
+                for sub_organ_iri, neuron_ids in sub_organs.items():
+                    column = columns.setdefault((organ_iri, sub_organ_iri), len(columns))
+                    for neuron_id in neuron_ids:
+                        # Bindings may reference statements missing from the snapshot
+                        if neuron_id in statement_index:
+                            rows.append(leaf)
+                            cols.append(column * len(statements) + statement_index[neuron_id])
+        incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.bool_), (rows, cols)),
+            shape=(len(leaves), len(columns) * len(statements)),
+        )
+        return cls(
+            np.array(leaves, dtype=np.str_),
+            np.array([organ for organ, _ in columns], dtype=np.str_),
+            np.array([sub_organ for _, sub_organ in columns], dtype=np.str_),
+            np.array(statements, dtype=np.str_),
+            incidence,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "HeatmapMatrix":
+        with np.load(path, allow_pickle=False) as arrays:
+            incidence = sparse.csr_matrix(
+                (np.ones(len(arrays["indices"]), dtype=np.bool_), arrays["indices"], arrays["indptr"]),
+                shape=tuple(arrays["shape"]),
+            )
+            return cls(
+                arrays["leaves"],
+                arrays["column_organs"],
+                arrays["column_sub_organs"],
+                arrays["statements"],
+                incidence,
+            )
+
+    def save(self, path: str):
+        with open(path, "wb") as matrix_file:
+            np.savez_compressed(
+                matrix_file,
+                leaves=self.leaves,
+                column_organs=self.column_organs,
+                column_sub_organs=self.column_sub_organs,
+                statements=self.statements,
+                indices=self.incidence.indices,
+                indptr=self.incidence.indptr,
+                shape=np.array(self.incidence.shape),
+            )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (
+                self.leaves,
+                self.column_organs,
+                self.column_sub_organs,
+                self.statements,
+                self.incidence.indices,
+                self.incidence.indptr,
+                self.incidence.data,
+            )
+        )
+
+    def count_unique_statements(self, row_leaves: list, column_groups: np.ndarray, group_count: int, statement_mask=None):
+        """
+        Unique statements for each row (a list of leaf indices) and column group
+        (column_groups maps each column to a group index, -1 to drop it).
+        Rows are rolled up from their leaves with a sparse product, so shared
+        statements are counted once per cell like the frontend does with Sets.
+        """
+        return self.count_unique_statements_by_mask(row_leaves, column_groups, group_count, [statement_mask])[0]
+
+    def count_unique_statements_by_mask(
+        self, row_leaves: list, column_groups: np.ndarray, group_count: int, statement_masks: list
+    ) -> list:
+        """
+        count_unique_statements for each of statement_masks (None meaning all statements),
+        rolling the rows up once.
+        """
+        statement_count = len(self.statements)
+        row_ids = [row for row, leaves in enumerate(row_leaves) for _ in leaves]
+        leaf_ids = [leaf for leaves in row_leaves for leaf in leaves]
+        rollup = sparse.csr_matrix(
+            (np.ones(len(leaf_ids), dtype=np.int32), (row_ids, leaf_ids)),
+            shape=(len(row_leaves), len(self.leaves)),
+        )
+        connections = (rollup @ self.incidence.astype(np.int32)).tocoo()
+        if connections.nnz == 0:
+            return [np.zeros((len(row_leaves), group_count), dtype=np.int64) for _ in statement_masks]
+
+        statements = connections.col % statement_count
+        groups = column_groups[connections.col // statement_count]
+        cells = connections.row.astype(np.int64) * group_count + groups
+        counts = []
+        for statement_mask in statement_masks:
+            keep = groups >= 0
+            if statement_mask is not None:
+                keep &= statement_mask[statements]
+            unique_cells = np.unique(cells[keep] * statement_count + statements[keep]) // statement_count
+            counts.append(
+                np.bincount(unique_cells, minlength=len(row_leaves) * group_count).reshape(len(row_leaves), group_count)
+            )
+        return counts
+
+
+def get_heatmap_matrix_path(datasnapshot_id: int) -> str:
+    return os.path.join(get_snapshot_artifacts_directory(datasnapshot_id), HEATMAP_MATRIX_FILENAME)
+
+
+def build_heatmap_matrix(snapshot: DataSnapshot) -> HeatmapMatrix:
+    statements = list(
+        ConnectivityStatement.objects.filter(snapshot=snapshot)
+        .order_by("id")
+        .values_list("reference_uri", flat=True)
+    )
+    return HeatmapMatrix.from_hierarchy(get_snapshot_hierarchy(snapshot), statements)
+
+
+def write_heatmap_matrix(snapshot: DataSnapshot):
+    os.makedirs(get_snapshot_artifacts_directory(snapshot.id), exist_ok=True)
+    path = get_heatmap_matrix_path(snapshot.id)
+    matrix = build_heatmap_matrix(snapshot)
+    tmp_path = f"{path}.tmp"
+    try:
+        matrix.save(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.info(
+        f"Heatmap matrix written for snapshot {snapshot.id}: {len(matrix.leaves)} leaves, "
+        f"{len(matrix.column_organs)} columns, {matrix.incidence.nnz} connections"
+    )
+
+
+def get_snapshot_heatmap_matrix(snapshot: DataSnapshot) -> HeatmapMatrix:
+    """
+    The heatmap matrix of a snapshot, kept in the worker's snapshot cache.
+    Snapshots ingested before the matrix existed get it built on the fly.
+    """
+    path = get_heatmap_matrix_path(snapshot.id)
+    return snapshot_cache.get_or_set(
+        (snapshot.id, snapshot.content_hash, "heatmap_matrix"),
+        lambda: HeatmapMatrix.load(path) if os.path.exists(path) else build_heatmap_matrix(snapshot),
+        size_of=lambda matrix: matrix.nbytes,
+    )
+
+
+def get_visible_rows(hierarchy: SnapshotHierarchy, expanded_ids: list, roots: list = None) -> list:
+    """
+    Rows of the heatmap for an expansion state: the roots (the hierarchy roots by default),
+    and the children of every expanded node, depth first (traverseItems in getHeatmapData).
+    """
+    expanded_ids = set(expanded_ids)
+    rows = []
+    if roots is None:
+        roots = [root_id for root_id, _, _ in ROOTS]
+    pending = [root_id for root_id in reversed(roots) if root_id in hierarchy.nodes]
+    while pending:
+        node_id = pending.pop()
+        rows.append(node_id)
+        if node_id in expanded_ids:
+            pending.extend(reversed(hierarchy.nodes[node_id]["children"]))
+    return rows
+
+
+def get_row_leaves(hierarchy: SnapshotHierarchy, matrix: HeatmapMatrix, rows: list) -> list:
+    # Leaf indices of the matrix under each row
+    return [
+        [matrix.leaf_index[leaf] for leaf in hierarchy.get_leaf_descendants(row) if leaf in matrix.leaf_index]
+        for row in rows
+    ]
+
+
+def get_heatmap(snapshot: DataSnapshot, expanded_ids: list, statement_selection=None, organ_ids=None) -> dict:
+    """
+    Unique statement counts of the visible rows for each end organ.
+    statement_selection (one boolean per statement of the snapshot, in id order, see
+    sckanner.services.bitmap_index) and organ_ids restrict the statements and columns,
+    None meaning all of them.
+    """
+    hierarchy = get_snapshot_hierarchy(snapshot)
+    matrix = get_snapshot_heatmap_matrix(snapshot)
+
+    organs = [organ for organ in hierarchy.organs.values() if organ_ids is None or organ["id"] in organ_ids]
+    organ_index = {organ["id"]: index for index, organ in enumerate(organs)}
+    column_groups = np.array(
+        [organ_index.get(organ_iri, -1) for organ_iri in matrix.column_organs], dtype=np.int64
+    )
+
+    rows = get_visible_rows(hierarchy, expanded_ids)
+    row_leaves = get_row_leaves(hierarchy, matrix, rows)
+    counts = matrix.count_unique_statements(row_leaves, column_groups, len(organs), statement_selection)
+    return {
+        "columns": [{"id": organ["id"], "name": organ["name"]} for organ in organs],
+        "rows": [
+            {"id": row, "name": hierarchy.nodes[row]["name"], "counts": row_counts}
+            for row, row_counts in zip(rows, counts.tolist())
+        ],
+    }
@@ -0,0 +1,299 @@
+"""
+Anatomical hierarchy (y axis) and end organs (x axis) of the explorer, built from the
+A-B-via-C SPARQL bindings of a snapshot like frontend/src/services/hierarchyService.ts does.
+"""
+import json
+import os
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from sckanner.models import DataSnapshot, HierarchyNode
+from sckanner.services.snapshot_cache import snapshot_cache
+
+HIERARCHY_ID_PATH_DELIMITER = "#"
+OTHER_X_AXIS_ID = "OTHER_X"
+OTHER_X_AXIS_LABEL = "Other"
+
+CNS_ID = "http://purl.obolibrary.org/obo/UBERON_0001017"
+PNS_ID = "http://purl.obolibrary.org/obo/UBERON_0000010"
+OTHERS_Y_AXIS_ID = "Others_Y_Axis_ID"
+
+# (id, name, is ancestor of a binding given its A_L1 name), the first match wins
+ROOTS = [
+    (CNS_ID, "Central nervous system", lambda a_l1_name: a_l1_name in ("brain", "spinal cord")),
+    (PNS_ID, "Peripheral nervous system", lambda a_l1_name: a_l1_name not in ("brain", "")),
+    (OTHERS_Y_AXIS_ID, "Others", lambda a_l1_name: a_l1_name == ""),
+]
+
+# Advisory lock serializing the hierarchy materializations
+HIERARCHY_LOCK_ID = 0x5C4A41E7A2C1
+
+
+class SnapshotHierarchy:
+    """
+    nodes: node path -> {"id", "name", "children": [node paths], "connection_details"},
+        connection_details being {end organ IRI: {sub organ IRI: [statement reference URIs]}} for leaves.
+    organs: end organ IRI -> {"id", "name", "children": {sub organ IRI: name}}.
+    """
+
+    def __init__(self, nodes: dict, organs: dict):
+        self.nodes = nodes
+        self.organs = organs
+
+    @classmethod
+    def from_bindings(cls, bindings: list) -> "SnapshotHierarchy":
+        return cls(build_hierarchical_nodes(bindings), build_organs(bindings))
+
+    def is_leaf(self, path: str) -> bool:
+        return not self.nodes.get(path, {}).get("children")
+
+    def get_leaf_descendants(self, path: str) -> list:
+        leaves = []
+        pending = [path]
+        while pending:
+            current = pending.pop()
+            children = self.nodes[current]["children"]
+            if children:
+                pending.extend(reversed(children))
+            else:
+                leaves.append(current)
+        return leaves
+
+    def get_end_organ_keys(self, organ_ids: list) -> list:
+        keys = []
+        for organ_id in organ_ids:
+            keys.append(organ_id)
+            keys.extend(self.organs.get(organ_id, {}).get("children", {}))
+        return list(dict.fromkeys(keys))
+
+
+def get_snapshot_hierarchy(snapshot: DataSnapshot) -> SnapshotHierarchy:
+    """
+    The hierarchy of a snapshot, kept in the worker's snapshot cache.
+    """
+    if not snapshot.a_b_via_c_json_file:
+        return SnapshotHierarchy.from_bindings([])
+    path = snapshot.a_b_via_c_json_file.path
+    return snapshot_cache.get_or_set(
+        (snapshot.id, snapshot.a_b_via_c_json_file.name, "hierarchy"),
+        lambda: SnapshotHierarchy.from_bindings(load_a_b_via_c_bindings(path)),
+        size_of=lambda _: os.path.getsize(path),
+    )
+
+
+@transaction.atomic
+def materialize_snapshot_hierarchy(snapshot: DataSnapshot):
+    """
+    Store the hierarchy of a snapshot as HierarchyNode rows, children in display order.
+    Paths are computed here and the nodes inserted in bulk instead of adding them one by one.
+    """
+    if connection.vendor == "postgresql":
+        # The trees of all the snapshots share the unique paths of HierarchyNode, each root taking the
+        # path after the last one: materializations are serialized until commit so they never collide
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [HIERARCHY_LOCK_ID])
+    HierarchyNode.objects.filter(snapshot=snapshot).delete()
+    hierarchy = get_snapshot_hierarchy(snapshot)
+    root_ids = [root_id for root_id, _, _ in ROOTS if root_id in hierarchy.nodes]
+    root = HierarchyNode.add_root(snapshot=snapshot, node_id="", name=str(snapshot), numchild=len(root_ids))
+
+    nodes = []
+    pending = [(root.path, root.depth + 1, root_ids)]
+    while pending:
+        parent_path, depth, child_ids = pending.pop()
+        for step, child_id in enumerate(child_ids, 1):
+            node = hierarchy.nodes[child_id]
+            path = HierarchyNode._get_path(parent_path, depth, step)
+            nodes.append(
+                HierarchyNode(
+                    snapshot=snapshot,
+                    node_id=child_id,
+                    name=node["name"],
+                    connection_details=node["connection_details"],
+                    path=path,
+                    depth=depth,
+                    numchild=len(node["children"]),
+                )
+            )
+            if node["children"]:
+                pending.append((path, depth + 1, node["children"]))
+    HierarchyNode.objects.bulk_create(nodes, batch_size=1000)
+    return len(nodes)
+
+
+def get_snapshot_hierarchy_nodes(datasnapshot_id: int, node_id: str = ""):
+    """
+    The materialized node node_id of a snapshot and its descendants, depth first.
+    """
+    root = HierarchyNode.objects.filter(snapshot_id=datasnapshot_id, node_id=node_id).first()
+    if root is None:
+        return HierarchyNode.objects.none()
+    return HierarchyNode.objects.filter(snapshot_id=datasnapshot_id, path__startswith=root.path).order_by("path")
+
+
+def get_compact_hierarchy(datasnapshot_id: int, node_id: str = ""):
+    """
+    The materialized hierarchy of a snapshot, or the subtree of node_id, depth first
+    as parallel lists: parents holds the index of each node's parent (-1 for the top nodes)
+    and ids the last component of the node ids, except for the top nodes that get the whole id.
+    None when the snapshot has no such node.
+    """
+    nodes = get_snapshot_hierarchy_nodes(datasnapshot_id, node_id).values_list("path", "node_id", "name")
+    hierarchy = {"ids": [], "names": [], "parents": []}
+    indexes = {}
+    for path, descendant_id, name in nodes.iterator():
+        if not indexes and not descendant_id:
+            # Root of the snapshot tree
+            indexes[path] = -1
+            continue
+        parent = indexes.get(path[: -HierarchyNode.steplen], -1)
+        indexes[path] = len(hierarchy["ids"])
+        hierarchy["ids"].append(get_node_id_from_path(descendant_id) if parent >= 0 else descendant_id)
+        hierarchy["names"].append(name)
+        hierarchy["parents"].append(parent)
+    return hierarchy if indexes else None
+
+
+def expand_entity_ids(datasnapshot_id: int, ids: list) -> list:
+    """
+    Entity ids a filter selection matches: hierarchy nodes stand for their leaf
+    descendants' entities, other values are entity ids already.
+    Leaves are found with prefix scans on the materialized paths.
+    """
+    paths = dict(
+        HierarchyNode.objects.filter(snapshot_id=datasnapshot_id, node_id__in=ids).values_list("node_id", "path")
+    )
+    expanded = [entity_id for entity_id in ids if entity_id not in paths]
+    if paths:
+        prefixes = Q()
+        for path in paths.values():
+            prefixes |= Q(path__startswith=path)
+        leaves = (
+            HierarchyNode.objects.filter(prefixes, snapshot_id=datasnapshot_id, numchild=0)
+            .order_by("path")
+            .values_list("node_id", flat=True)
+        )
+        expanded.extend(get_node_id_from_path(leaf) for leaf in leaves)
+    return list(dict.fromkeys(expanded))
+
+
+def load_a_b_via_c_bindings(path: str) -> list:
+    with open(path, "r") as a_b_via_c_json_file:
+        return json.load(a_b_via_c_json_file)["results"]["bindings"]
+
+
+def get_node_id_from_path(path: str) -> str:
+    return path.split(HIERARCHY_ID_PATH_DELIMITER)[-1]
+
+
+def build_hierarchical_nodes(bindings: list) -> dict:
+    nodes = {root_id: _new_node(root_id, name) for root_id, name, _ in ROOTS}
+    post_processing_entries = []
+
+    for entry in bindings:
+        current_parent_id = _get_root_node_id(_value(entry, "A_L1") or "")
+        current_path = current_parent_id
+
+        # Handle all hierarchy levels until there are no more A_LX_ID entries
+        level = 1
+        while entry.get(f"A_L{level}_ID"):
+            level_id = _value(entry, f"A_L{level}_ID")
+            level_name = _value(entry, f"A_L{level}")
+            if level_id and level_name:
+                current_path += f"{HIERARCHY_ID_PATH_DELIMITER}{level_id}"
+                if current_path not in nodes:
+                    nodes[current_path] = _new_node(current_path, level_name)
+                nodes[current_parent_id]["children"][current_path] = None
+                current_parent_id = current_path
+            level += 1
+
+        # Process the leaf node given by A_ID column
+        if _value(entry, "A_ID") and _value(entry, "A"):
+            leaf_node_id = f"{current_path}{HIERARCHY_ID_PATH_DELIMITER}{_value(entry, 'A_ID')}"
+            leaf_node = _get_or_create_leaf(nodes, leaf_node_id, _value(entry, "A"))
+            neuron_id = _value(entry, "Neuron_ID")
+            target_organ_iri = _value(entry, "Target_Organ_IRI")
+            end_organ_iri = _value(entry, "B_ID")
+            if not target_organ_iri or not end_organ_iri:
+                post_processing_entries.append((entry, current_parent_id, leaf_node_id))
+                continue
+            if neuron_id:
+                _add_connection(leaf_node, target_organ_iri, end_organ_iri, neuron_id)
+            nodes[current_parent_id]["children"][leaf_node_id] = None
+
+    # Entries without end organ are attached to their target organ, or to "Other"
+    for entry, current_parent_id, leaf_node_id in post_processing_entries:
+        leaf_node = _get_or_create_leaf(nodes, leaf_node_id, _value(entry, "A") or "")
+        neuron_id = _value(entry, "Neuron_ID")
+        if neuron_id:
+            target_organ_iri = _value(entry, "Target_Organ_IRI") or OTHER_X_AXIS_ID
+            end_organ_iri = _value(entry, "B_ID")
+            if not end_organ_iri:
+                end_organ_iri = OTHER_X_AXIS_ID
+            elif end_organ_iri in leaf_node["connection_details"]:
+                target_organ_iri = end_organ_iri
+            _add_connection(leaf_node, target_organ_iri, end_organ_iri, neuron_id)
+        nodes[current_parent_id]["children"][leaf_node_id] = None
+
+    for node in nodes.values():
+        node["children"] = sorted(
+            node["children"],
+            key=lambda child_id: (not nodes[child_id]["children"], _natural_sort_key(nodes[child_id]["name"])),
+        )
+    return nodes
+
+
+def build_organs(bindings: list) -> dict:
+    organs = {}
+    other_organ = {"id": OTHER_X_AXIS_ID, "name": OTHER_X_AXIS_LABEL, "children": {}}
+    for binding in bindings:
+        organ_id = _value(binding, "Target_Organ_IRI")
+        organ_name = _value(binding, "Target_Organ")
+        child_id = _value(binding, "B_ID")
+        child_name = _value(binding, "B")
+        if organ_id and organ_name:
+            organ = organs.setdefault(organ_id, {"id": organ_id, "name": organ_name, "children": {}})
+            organ["children"].setdefault(organ_id, organ_name)
+            if child_id and child_name:
+                organ["children"].setdefault(child_id, child_name)
+        elif child_id and child_name:
+            other_organ["children"].setdefault(child_id, child_name)
+    organs = dict(sorted(organs.items(), key=lambda item: _natural_sort_key(item[1]["name"])))
+    organs[OTHER_X_AXIS_ID] = other_organ
+    return organs
+
+
+def _value(binding: dict, key: str):
+    variable = binding.get(key)
+    return variable.get("value") if variable else None
+
+
+def _new_node(node_id: str, name: str) -> dict:
+    # children is used as an insertion ordered set until the nodes are sorted
+    return {"id": node_id, "name": name, "children": {}, "connection_details": None}
+
+
+def _get_or_create_leaf(nodes: dict, leaf_node_id: str, name: str) -> dict:
+    if leaf_node_id not in nodes:
+        nodes[leaf_node_id] = _new_node(leaf_node_id, name)
+    leaf_node = nodes[leaf_node_id]
+    if leaf_node["connection_details"] is None:
+        leaf_node["connection_details"] = {}
+    return leaf_node
+
+
+def _add_connection(leaf_node: dict, target_organ_iri: str, end_organ_iri: str, neuron_id: str):
+    leaf_node["connection_details"].setdefault(target_organ_iri, {}).setdefault(end_organ_iri, []).append(neuron_id)
+
+
+def _get_root_node_id(a_l1_name: str) -> str:
+    for root_id, _, is_ancestor in ROOTS:
+        if is_ancestor(a_l1_name):
+            return root_id
+    return OTHERS_Y_AXIS_ID
+
+
+def _natural_sort_key(name: str):
+    return [int(part) if part.isdigit() else part.casefold() for part in re.split(r"(\d+)", name or "")]
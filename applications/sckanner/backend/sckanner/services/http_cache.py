@@ -0,0 +1,49 @@
+import hashlib
+
+from django.utils.cache import patch_cache_control
+
+from sckanner.models import DataSnapshot, DataSnapshotStatus
+
+# Content of a completed snapshot never changes, see DataSnapshot.content_hash
+SNAPSHOT_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def get_completed_snapshot_content_hash(datasnapshot_id: int):
+    return (
+        DataSnapshot.objects.filter(id=datasnapshot_id, status=DataSnapshotStatus.COMPLETED)
+        .values_list("content_hash", flat=True)
+        .first()
+    )
+
+
+async def aget_completed_snapshot_payload_hashes(datasnapshot_id: int):
+    """
+    Hashes of the payload files of a completed snapshot by format and encoding,
+    None when the snapshot is not completed.
+    """
+    return await (
+        DataSnapshot.objects.filter(id=datasnapshot_id, status=DataSnapshotStatus.COMPLETED)
+        .values_list("payload_hashes", flat=True)
+        .afirst()
+    )
+
+
+def get_snapshot_etag(content_hash: str) -> str:
+    """
+    Strong ETag of a snapshot-scoped representation, content_hash being the hash of its bytes.
+    """
+    return f'"{content_hash}"'
+
+
+def get_content_etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def patch_immutable_cache_control(response):
+    patch_cache_control(response, public=True, max_age=SNAPSHOT_CACHE_MAX_AGE, immutable=True)
+    return response
+
+
+def patch_revalidate_cache_control(response):
+    patch_cache_control(response, no_cache=True)
+    return response
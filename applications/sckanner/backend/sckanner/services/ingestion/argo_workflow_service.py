@@ -15,10 +15,11 @@ class ArgoWorkflowService:
         self.timestamp = timestamp
         self.version = version
 
-    def run_ingestion_workflow(self, source: DataSource, a_b_via_c_json_url: str):
+    def run_ingestion_workflow(self, source: DataSource, a_b_via_c_json_url: str, base_snapshot: DataSnapshot = None):
         """
         Run the ingestion workflow for the given source.
         This method is called by the Argo workflow.
+        With a base snapshot, its unchanged statements are reused.
         """
         from cloudharness.workflows import operations, tasks
 
@@ -33,20 +34,23 @@ class ArgoWorkflowService:
         )
         logger.info(f"Running ingestion workflow for source: {source}")
         logger.info(f"Volume directory: {get_volume_directory(current_app)}")
+        command = [
+            "python",
+            "manage.py",
+            "connectivity_statements_ingestion",
+            "--source_id",
+            str(source.id),
+            "--snapshot_id",
+            str(snapshot.id),
+            "--a_b_via_c_json_url",
+            a_b_via_c_json_url,
+        ]
+        if base_snapshot is not None:
+            command += ["--base_snapshot_id", str(base_snapshot.id)]
         task_ingestion = tasks.CustomTask(
             "ingestion",
             image_name="sckanner",
-            command=[
-                "python",
-                "manage.py",
-                "connectivity_statements_ingestion",
-                "--source_id",
-                str(source.id),
-                "--snapshot_id",
-                str(snapshot.id),
-                "--a_b_via_c_json_url",
-                a_b_via_c_json_url,
-            ],
+            command=command,
             retry_limit=2,
             volume_mounts=[get_volume_directory(current_app)],
         )
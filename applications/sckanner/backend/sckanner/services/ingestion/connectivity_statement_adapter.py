@@ -5,22 +5,60 @@ from sckanner.services.ingestion.ingestion_schemas import (
 )
 import os
 import sys
-import json
 import importlib.util
+from typing import Iterator
 from sckanner.services.ingestion.logger_service import logger
-from jsonschema import validate, ValidationError
+from sckanner.services.ingestion.statement_validation import StatementValidationReport, iter_validation_errors
+from sckanner.services.statement_documents import get_statement_content_hashes
+from sckanner.services.statement_fields import get_statement_content_hash
 
 
 class ConnectivityStatementAdapter:
-    def __init__(self, source, snapshot):
+    def __init__(self, source, snapshot, base_snapshot=None, validation_policy=None):
         self.source = source
         self.snapshot = snapshot
+        self.base_snapshot = base_snapshot
         self.reference_uri_key = source.reference_uri_key
+        # Invalid statements, reported once the statements are consumed
+        self.validation_report = StatementValidationReport(snapshot.id, validation_policy)
 
     def extract_statements(self) -> ConnectivityStatementData:
         file_path = self.source.python_code_file_for_statements_retrieval
         return self._parse_and_validate_statements(file_path)
 
+    def _validate_statements(self, statements, base_content_hashes) -> Iterator[ConnectivityStatement]:
+        # Statements identical to the ones of the base snapshot were validated when it was ingested.
+        # A base statement is reused once: its base row is copied by reference URI
+        def hash_statements():
+            reused_uris = set()
+            for statement in statements:
+                content_hash = get_statement_content_hash(statement)
+                reference_uri = statement.get(self.reference_uri_key) if isinstance(statement, dict) else None
+                reused = (
+                    isinstance(reference_uri, str)
+                    and reference_uri not in reused_uris
+                    and base_content_hashes.get(reference_uri) == content_hash
+                )
+                if reused:
+                    reused_uris.add(reference_uri)
+                yield statement, content_hash, reused
+
+        items = iter_validation_errors(
+            hash_statements(), get_statement=lambda item: None if item[2] else item[0]
+        )
+        for position, ((statement, content_hash, reused), errors) in enumerate(items):
+            if errors:
+                reference_uri = statement.get(self.reference_uri_key) if isinstance(statement, dict) else None
+                self.validation_report.add(position, reference_uri, statement, errors)
+                continue
+            yield ConnectivityStatement(
+                data=statement,
+                reference_uri=statement[self.reference_uri_key],
+                content_hash=content_hash,
+                reused=reused,
+            )
+        self.validation_report.close()
+
     def _parse_and_validate_statements(
         self, file_path: str
     ) -> ConnectivityStatementData:
@@ -45,31 +83,12 @@ class ConnectivityStatementAdapter:
             if self.snapshot.a_b_via_c_json_file:
                 kwargs['a_b_via_c_json_file_path'] = self.snapshot.a_b_via_c_json_file.path
             
-            # Call get_statements with version and any additional kwargs
+            # Call get_statements with version and any additional kwargs.
+            # It may return a list or yield the statements: they are validated one at a time.
             statements = module.get_statements(self.snapshot.version, **kwargs)
-            try:
-                # Validate the statements against the schema
-                current_path = os.path.dirname(os.path.abspath(__file__))
-                schema_path = os.path.join(current_path, 'schemas', 'statement-validator.json')
-                if not os.path.exists(schema_path):
-                    raise FileNotFoundError(f"Schema file not found at {schema_path}")
-                # Load the schema
-                with open(schema_path, 'r') as schema_file:
-                    schema = json.load(schema_file)
-                validate(instance=statements, schema=schema)
-                statements = [
-                    ConnectivityStatement(
-                        data=statement, reference_uri=statement[self.reference_uri_key]
-                    )
-                    for statement in statements
-                ]
-            except ValidationError as e:
-                logger.error(
-                    f"Validation error in statements: {e.message}"
-                )
-                raise ValueError(f"Validation error in statements: {e.message}")
+            base_content_hashes = get_statement_content_hashes(self.base_snapshot) if self.base_snapshot else {}
             return ConnectivityStatementData(
-                statements=statements,
+                statements=self._validate_statements(statements, base_content_hashes),
                 snapshot=DataSnapshotData(
                     source=self.source.id, datetime=self.snapshot.timestamp
                 ),
@@ -1,14 +1,22 @@
+import time
+from datetime import timedelta
+
 from .connectivity_statement_adapter import ConnectivityStatementAdapter
 from .ingest_datasnapshot_connectivity_statements import (
     ingest_datasnapshot_connectivity_statements,
 )
+from .snapshot_artifacts import build_snapshot_artifacts
 from sckanner.services.ingestion.logger_service import logger
 
 
 class ConnectivityStatementIngestionService:
 
-    def __init__(self, snapshot):
+    def __init__(self, snapshot, base_snapshot=None, validation_policy=None):
         self.snapshot = snapshot
+        # Snapshot of the same source whose unchanged statements are reused
+        self.base_snapshot = base_snapshot
+        # What to do with invalid statements, see sckanner.services.ingestion.statement_validation
+        self.validation_policy = validation_policy
 
     def download_and_save_a_b_via_c_json_file(self, a_b_via_c_json_url: str) -> str:
         import os
@@ -51,13 +59,24 @@ class ConnectivityStatementIngestionService:
             f"Starting Connectivity Statement Ingestion for source: {source.name}"
         )
         logger.info(f"Using snapshot: {self.snapshot.id}")
+        started = time.monotonic()
         try:
             adapter = ConnectivityStatementAdapter(
-                source=source, snapshot=self.snapshot
+                source=source,
+                snapshot=self.snapshot,
+                base_snapshot=self.base_snapshot,
+                validation_policy=self.validation_policy,
             )
             statements = adapter.extract_statements()
             self._ingest_connectivity_statements_to_db(statements)
-            logger.info("Ingestion completed")
+            if adapter.validation_report.errors:
+                # Statements skipped or quarantined
+                self.snapshot.message = adapter.validation_report.get_summary()
+                self.snapshot.save(update_fields=["message"])
+            build_snapshot_artifacts(self.snapshot)
+            self.snapshot.ingestion_duration = timedelta(seconds=time.monotonic() - started)
+            self.snapshot.save(update_fields=["ingestion_duration"])
+            logger.info(f"Ingestion completed in {self.snapshot.ingestion_duration}")
         except Exception as e:
             logger.error(f"Error ingesting statements: {e}")
             raise Exception(f"Error ingesting statements: {e}")
@@ -67,7 +86,7 @@ class ConnectivityStatementIngestionService:
         try:
             logger.info(f"Ingesting statements now to db")
             ingest_datasnapshot_connectivity_statements(
-                cs_data=statements, snapshot=self.snapshot
+                cs_data=statements, snapshot=self.snapshot, base_snapshot=self.base_snapshot
             )
             logger.info(f"Statements ingested to db")
         except Exception as e:
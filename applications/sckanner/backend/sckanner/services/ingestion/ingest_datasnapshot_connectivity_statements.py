@@ -1,22 +1,88 @@
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from .ingestion_schemas import ConnectivityStatementData
 from sckanner.models import DataSnapshot
 from sckanner.models import ConnectivityStatement as DBConnectivityStatement
 from sckanner.services.ingestion.logger_service import logger
+from sckanner.services.ingestion.statement_loader import (
+	STATEMENT_LOAD_BATCH_SIZE,
+	copy_base_statements,
+	iter_batches,
+	load_connectivity_statements,
+)
+from sckanner.services.statement_documents import lock_statement_documents, save_statement_documents
+from sckanner.services.statement_fields import extract_statement_filter_fields
+from sckanner.signals import connectivity_statements_changed
+
 # we would like another parameter -- depending on which - we either delete all and then insert, or we update
 @transaction.atomic
-def ingest_datasnapshot_connectivity_statements(cs_data: ConnectivityStatementData, snapshot: DataSnapshot):
+def ingest_datasnapshot_connectivity_statements(cs_data: ConnectivityStatementData, snapshot: DataSnapshot, base_snapshot: DataSnapshot = None, batch_size: int = STATEMENT_LOAD_BATCH_SIZE):
 	"""
 	Add new connectivity statements to the database - for a given snapshot.
+	Statements are consumed and loaded (with COPY on PostgreSQL) batch by batch,
+	so at most batch_size of them are held in memory. Only the documents not
+	stored for a previous snapshot are inserted, see sckanner.services.statement_documents.
+	With a base snapshot, statements it has unchanged are copied from it in the database,
+	and the numbers of reused, changed and removed statements are saved on the snapshot.
 	Transaction ensures the operation is atomic.
 	"""
 	logger.info(f"Adding connectivity statements to db for source {cs_data.snapshot.source} as snapshot {snapshot.id}")
-	logger.info(f"number of statements to ingested as part of snapshot {snapshot.id}: {len(cs_data.statements)}")
+	# Documents looked up or copied from the base snapshot must not be deleted as orphans before commit
+	lock_statement_documents()
 	# Insert new data
-	DBConnectivityStatement.objects.bulk_create(
-		[DBConnectivityStatement(
-			data=entry.data,
-			reference_uri=entry.reference_uri,
-			snapshot=snapshot
-		) for entry in cs_data.statements]
+	load_connectivity_statements(
+		iter_snapshot_statements(cs_data.statements, snapshot, base_snapshot, batch_size), batch_size
+	)
+	ingested = DBConnectivityStatement.objects.filter(snapshot=snapshot).count()
+	logger.info(f"number of statements ingested as part of snapshot {snapshot.id}: {ingested}")
+	if base_snapshot is not None:
+		save_base_snapshot_counts(snapshot, base_snapshot, ingested)
+	transaction.on_commit(
+		lambda: connectivity_statements_changed.send(sender=DBConnectivityStatement, snapshot_id=snapshot.id)
+	)
+
+
+def iter_snapshot_statements(statements, snapshot: DataSnapshot, base_snapshot: DataSnapshot, batch_size: int):
+	"""
+	Unsaved statements of the snapshot, referencing their stored documents.
+	Statements reused from the base snapshot are copied instead, batch by batch.
+	"""
+	for batch in iter_batches(statements, batch_size):
+		reused = [entry.reference_uri for entry in batch if entry.reused]
+		if reused:
+			copy_base_statements(base_snapshot.id, snapshot.id, reused)
+		batch = [entry for entry in batch if not entry.reused]
+		document_ids = save_statement_documents({entry.content_hash: entry.data for entry in batch})
+		for entry in batch:
+			yield DBConnectivityStatement(
+				reference_uri=entry.reference_uri,
+				snapshot=snapshot,
+				document_id=document_ids[entry.content_hash],
+				**extract_statement_filter_fields(entry.data)
+			)
+
+
+def save_base_snapshot_counts(snapshot: DataSnapshot, base_snapshot: DataSnapshot, statement_count: int):
+	"""
+	Count the statements of the snapshot unchanged since the base snapshot (same reference URI
+	and document), the other ones, and the statements of the base snapshot no longer present.
+	"""
+	def matching(snapshot_id, **fields):
+		return DBConnectivityStatement.objects.filter(
+			snapshot_id=snapshot_id, reference_uri=OuterRef("reference_uri"), **fields
+		)
+
+	snapshot.base_snapshot = base_snapshot
+	snapshot.reused_statement_count = DBConnectivityStatement.objects.filter(
+		Exists(matching(base_snapshot.id, document_id=OuterRef("document_id"))), snapshot=snapshot
+	).count()
+	snapshot.changed_statement_count = statement_count - snapshot.reused_statement_count
+	snapshot.removed_statement_count = DBConnectivityStatement.objects.filter(
+		~Exists(matching(snapshot.id)), snapshot=base_snapshot, reference_uri__isnull=False
+	).count()
+	snapshot.save(update_fields=["base_snapshot", "reused_statement_count", "changed_statement_count", "removed_statement_count"])
+	logger.info(
+		f"Statements of snapshot {snapshot.id} since snapshot {base_snapshot.id}: "
+		f"{snapshot.reused_statement_count} reused, {snapshot.changed_statement_count} changed, "
+		f"{snapshot.removed_statement_count} removed"
 	)
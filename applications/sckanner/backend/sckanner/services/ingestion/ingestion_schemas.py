@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterable
 from pydantic import BaseModel
 from typing import Dict
 from datetime import datetime
@@ -9,6 +9,9 @@ from datetime import datetime
 class ConnectivityStatement(BaseModel):
 	data: Dict
 	reference_uri: str
+	content_hash: str
+	# Unchanged since the base snapshot of an incremental ingestion, so not validated
+	reused: bool = False
 
 
 class DataSnapshotData(BaseModel):
@@ -17,7 +20,8 @@ class DataSnapshotData(BaseModel):
 
 
 class ConnectivityStatementData(BaseModel):
-	statements: List[ConnectivityStatement]
+	# Validated lazily, item by item, as the statements are consumed (once)
+	statements: Iterable[ConnectivityStatement]
 	snapshot: DataSnapshotData
 
 # ------------ End of Data Types for Migration helper - Ingestion - for COMPOSER and NEURONDM ------------
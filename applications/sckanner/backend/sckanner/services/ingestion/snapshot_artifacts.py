@@ -0,0 +1,60 @@
+import hashlib
+
+from sckanner.models import ConnectivityStatement, DataSnapshot
+from sckanner.services.bitmap_index import write_bitmap_index
+from sckanner.services.facets import build_snapshot_facets
+from sckanner.services.forward_connections import build_forward_graph
+from sckanner.services.heatmap import write_heatmap_matrix
+from sckanner.services.hierarchy import materialize_snapshot_hierarchy
+from sckanner.services.search import build_snapshot_search_index
+from sckanner.services.snapshot_entities import build_snapshot_entities
+from sckanner.services.snapshot_payload import (
+    PAYLOAD_FILE_READ_CHUNK_SIZE,
+    get_snapshot_payload_hashes,
+    get_snapshot_payload_path,
+    get_snapshot_payload_sizes,
+    write_snapshot_payloads,
+)
+from sckanner.services.ingestion.logger_service import logger
+
+
+def build_snapshot_artifacts(snapshot: DataSnapshot):
+    """
+    Build the files and tables derived from the statements of a snapshot.
+    Statements of a snapshot never change once ingested, so this runs once at ingestion time.
+    """
+    logger.info(f"Building artifacts for snapshot {snapshot.id}")
+    build_snapshot_entities(snapshot)
+    write_snapshot_payloads(snapshot)
+
+    snapshot.content_hash = compute_snapshot_content_hash(snapshot)
+    snapshot.statement_count = ConnectivityStatement.objects.filter(snapshot=snapshot).count()
+    snapshot.payload_sizes = get_snapshot_payload_sizes(snapshot.id)
+    snapshot.payload_hashes = get_snapshot_payload_hashes(snapshot.id)
+    snapshot.save(update_fields=["content_hash", "statement_count", "payload_sizes", "payload_hashes"])
+    logger.info(f"Content hash of snapshot {snapshot.id}: {snapshot.content_hash}")
+
+    node_count = materialize_snapshot_hierarchy(snapshot)
+    logger.info(f"Hierarchy of snapshot {snapshot.id} materialized: {node_count} nodes")
+    write_heatmap_matrix(snapshot)
+    build_forward_graph(snapshot)
+    build_snapshot_search_index(snapshot)
+    build_snapshot_facets(snapshot, write_bitmap_index(snapshot))
+
+
+def compute_snapshot_content_hash(snapshot: DataSnapshot) -> str:
+    """
+    SHA-256 over the canonical statements payload and the A-B-via-C file, the content
+    the snapshot-scoped caches and media URLs depend on. Each payload file is
+    validated by its own hash instead, see get_snapshot_payload_hashes.
+    """
+    content_hash = hashlib.sha256()
+    paths = [get_snapshot_payload_path(snapshot.id)]
+    if snapshot.a_b_via_c_json_file:
+        paths.append(snapshot.a_b_via_c_json_file.path)
+    for path in paths:
+        with open(path, "rb") as content_file:
+            while chunk := content_file.read(PAYLOAD_FILE_READ_CHUNK_SIZE):
+                content_hash.update(chunk)
+        content_hash.update(b"\0")
+    return content_hash.hexdigest()
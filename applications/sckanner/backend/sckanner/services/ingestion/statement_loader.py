@@ -0,0 +1,133 @@
+"""
+Bulk loading of connectivity statements: rows are streamed to PostgreSQL with
+COPY ... FROM STDIN (CSV), inside the current transaction, instead of being sent
+as multi-row INSERTs. Other database backends use batched bulk_create.
+Statements unchanged since a base snapshot are copied from it server side, which is
+PostgreSQL only (the reference URIs are passed as an array to = ANY).
+"""
+import io
+import json
+import time
+from itertools import islice
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db.models import JSONField
+
+from sckanner.models import ConnectivityStatement
+from sckanner.services.ingestion.logger_service import logger
+
+STATEMENT_LOAD_BATCH_SIZE = 1000
+# Fields that depend on the other statements of the snapshot, set after loading
+# (see sckanner.services.forward_connections), so not copied from a base snapshot
+SNAPSHOT_DEPENDENT_FIELDS = ("forward_ids", "reverse_ids", "forward_paths")
+
+
+def load_connectivity_statements(statements, batch_size: int = STATEMENT_LOAD_BATCH_SIZE) -> int:
+    """
+    Insert unsaved ConnectivityStatement instances, consumed batch by batch,
+    and return how many were inserted. Their ids are not set.
+    """
+    started = time.monotonic()
+    batches = iter_batches(statements, batch_size)
+    if connection.vendor == "postgresql":
+        loaded = _copy_statements(batches)
+    else:
+        loaded = 0
+        for batch in batches:
+            ConnectivityStatement.objects.bulk_create(batch)
+            loaded += len(batch)
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Loaded {loaded} statements in {elapsed:.2f}s ({loaded / elapsed if elapsed else 0:.0f} rows/s)"
+    )
+    return loaded
+
+
+def get_copy_fields() -> list:
+    # Every column but the generated primary key
+    return [field for field in ConnectivityStatement._meta.concrete_fields if not field.primary_key]
+
+
+def copy_base_statements(base_snapshot_id: int, snapshot_id: int, reference_uris: list) -> int:
+    """
+    Copy the statements of the base snapshot with the given reference URIs to the snapshot,
+    with a single INSERT ... SELECT (PostgreSQL only), and return how many were copied.
+    Each reference URI must be given once, and match a single statement of the base snapshot.
+    """
+    quote_name = connection.ops.quote_name
+    columns, values, params = [], [], []
+    for field in get_copy_fields():
+        columns.append(quote_name(field.column))
+        if field.name == "snapshot":
+            values.append("%s")
+            params.append(snapshot_id)
+        elif field.name in SNAPSHOT_DEPENDENT_FIELDS:
+            values.append(f"%s::{field.db_type(connection)}")
+            params.append(field.get_db_prep_save(field.get_default(), connection))
+        else:
+            values.append(quote_name(field.column))
+    table = quote_name(ConnectivityStatement._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(values)} FROM {table} "
+        f"WHERE {quote_name('snapshot_id')} = %s AND {quote_name('reference_uri')} = ANY(%s)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, base_snapshot_id, list(reference_uris)])
+        return cursor.rowcount
+
+
+def _copy_statements(batches) -> int:
+    fields = get_copy_fields()
+    quote_name = connection.ops.quote_name
+    sql = (
+        f"COPY {quote_name(ConnectivityStatement._meta.db_table)} "
+        f"({', '.join(quote_name(field.column) for field in fields)}) FROM STDIN WITH (FORMAT csv)"
+    )
+    loaded = 0
+    with connection.cursor() as cursor:
+        # A COPY per batch: producing the next batch may run queries on the connection
+        for batch in batches:
+            rows = encode_copy_rows(batch, fields)
+            if is_psycopg3:
+                with cursor.cursor.copy(sql) as copy:
+                    copy.write(rows)
+            else:
+                cursor.cursor.copy_expert(sql, io.StringIO(rows))
+            loaded += len(batch)
+    return loaded
+
+
+def encode_copy_rows(statements: list, fields: list) -> str:
+    return "".join(
+        ",".join(_encode_copy_value(field, field.value_from_object(statement)) for field in fields) + "\n"
+        for statement in statements
+    )
+
+
+def _encode_copy_value(field, value) -> str:
+    # In CSV COPY, an unquoted empty value is NULL and a quoted one an empty string
+    if value is None:
+        return ""
+    if isinstance(field, JSONField):
+        text = json.dumps(value, cls=field.encoder)
+    elif isinstance(field, ArrayField):
+        text = _encode_array(value)
+    else:
+        text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _encode_array(values) -> str:
+    elements = (
+        "NULL" if value is None else '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+        for value in values
+    )
+    return "{" + ",".join(elements) + "}"
+
+
+def iter_batches(items, batch_size: int):
+    items = iter(items)
+    while batch := list(islice(items, batch_size)):
+        yield batch
@@ -0,0 +1,169 @@
+"""
+Validation of the ingested statements against schemas/statement-validator.json.
+
+The schema is loaded and checked once per process, and chunks of statements are
+validated by a pool of processes, a few chunks ahead of the ingestion, keeping
+the statements' order. Every error of a statement is reported, by reference URI.
+What happens to invalid statements depends on the validation policy:
+
+- fail: the ingestion fails, with the errors of all the invalid statements;
+- skip: invalid statements are left out of the snapshot;
+- quarantine: invalid statements are left out of the snapshot, and written with their
+  errors to quarantined-statements.jsonl in the snapshot artifacts directory.
+"""
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from jsonschema.validators import validator_for
+
+from sckanner.services.datasnapshot import get_snapshot_artifacts_directory
+from sckanner.services.ingestion.logger_service import logger
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemas", "statement-validator.json")
+QUARANTINE_FILENAME = "quarantined-statements.jsonl"
+
+VALIDATION_POLICY_FAIL = "fail"
+VALIDATION_POLICY_SKIP = "skip"
+VALIDATION_POLICY_QUARANTINE = "quarantine"
+VALIDATION_POLICIES = (VALIDATION_POLICY_FAIL, VALIDATION_POLICY_SKIP, VALIDATION_POLICY_QUARANTINE)
+
+DEFAULT_VALIDATION_POLICY = VALIDATION_POLICY_FAIL
+DEFAULT_VALIDATION_WORKERS = 4
+VALIDATION_CHUNK_SIZE = 200
+# Errors reported per statement, and statements listed in the summary
+MAX_STATEMENT_ERRORS = 5
+MAX_SUMMARY_STATEMENTS = 20
+
+
+@lru_cache(maxsize=None)
+def get_statements_schema() -> dict:
+    if not os.path.exists(SCHEMA_PATH):
+        raise FileNotFoundError(f"Schema file not found at {SCHEMA_PATH}")
+    with open(SCHEMA_PATH, "r") as schema_file:
+        return json.load(schema_file)
+
+
+@lru_cache(maxsize=None)
+def get_statement_validator():
+    """
+    Validator of a single statement (the items of the statements array schema), built once per process.
+    """
+    schema = get_statements_schema()
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema["items"])
+
+
+@lru_cache(maxsize=None)
+def get_statement_field_names() -> frozenset:
+    """
+    The top-level fields of a statement, as defined by the schema.
+    """
+    return frozenset(get_statements_schema()["items"]["properties"])
+
+
+def get_statement_errors(statement) -> list:
+    """
+    Messages of the validation errors of a statement, empty when it is valid.
+    """
+    errors = get_statement_validator().iter_errors(statement)
+    return [
+        f"{'/'.join(str(part) for part in error.absolute_path) or '(statement)'}: {error.message}"
+        for error in islice(errors, MAX_STATEMENT_ERRORS)
+    ]
+
+
+def validate_statement_chunk(statements: list) -> list:
+    # Run in the pool processes (this module imports no models, for spawned ones);
+    # None stands for a statement not to validate
+    return [[] if statement is None else get_statement_errors(statement) for statement in statements]
+
+
+def iter_validation_errors(items, get_statement=lambda item: item, workers: int = None):
+    """
+    (item, errors) for each of items, in order, errors being the messages of the validation
+    errors of get_statement(item), empty when it is valid or when get_statement(item) is None.
+    """
+    workers = workers or getattr(settings, "STATEMENT_VALIDATION_WORKERS", DEFAULT_VALIDATION_WORKERS)
+    items = iter(items)
+    chunks = iter(lambda: list(islice(items, VALIDATION_CHUNK_SIZE)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            yield from zip(chunk, validate_statement_chunk([get_statement(item) for item in chunk]))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Chunks submitted and not consumed yet, at most two per process
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(validate_statement_chunk, [get_statement(item) for item in chunk])))
+            if len(pending) > 2 * workers:
+                chunk, errors = pending.popleft()
+                yield from zip(chunk, errors.result())
+        while pending:
+            chunk, errors = pending.popleft()
+            yield from zip(chunk, errors.result())
+
+
+class StatementValidationReport:
+    """
+    Invalid statements of an ingestion, handled according to the validation policy.
+    """
+
+    def __init__(self, snapshot_id: int, policy: str = None):
+        policy = policy or getattr(settings, "STATEMENT_VALIDATION_POLICY", DEFAULT_VALIDATION_POLICY)
+        if policy not in VALIDATION_POLICIES:
+            raise ValueError(f"Invalid validation policy: {policy}")
+        self.snapshot_id = snapshot_id
+        self.policy = policy
+        # Errors by reference URI, or by position for statements without one
+        self.errors = {}
+        self.quarantine_file = None
+
+    def add(self, position: int, reference_uri, statement, errors: list):
+        key = reference_uri if isinstance(reference_uri, str) and reference_uri not in self.errors else f"#{position}"
+        self.errors[key] = errors
+        logger.error(f"Invalid statement {key}: {'; '.join(errors)}")
+        if self.policy == VALIDATION_POLICY_QUARANTINE:
+            if self.quarantine_file is None:
+                os.makedirs(get_snapshot_artifacts_directory(self.snapshot_id), exist_ok=True)
+                self.quarantine_file = open(self._get_quarantine_path() + ".tmp", "w")
+            record = {"position": position, "reference_uri": reference_uri, "errors": errors, "statement": statement}
+            self.quarantine_file.write(json.dumps(record, default=str) + "\n")
+
+    def close(self):
+        """
+        Publish the quarantined statements, and fail with the errors under the fail policy.
+        """
+        quarantine_path = self._get_quarantine_path()
+        if self.quarantine_file is not None:
+            self.quarantine_file.close()
+            self.quarantine_file = None
+            os.replace(quarantine_path + ".tmp", quarantine_path)
+        elif os.path.exists(quarantine_path):
+            # Left by a previous attempt of the ingestion
+            os.remove(quarantine_path)
+        if self.errors and self.policy == VALIDATION_POLICY_FAIL:
+            raise ValueError(self.get_summary())
+
+    def get_summary(self) -> str:
+        if not self.errors:
+            return ""
+        outcome = {
+            VALIDATION_POLICY_FAIL: "found",
+            VALIDATION_POLICY_SKIP: "skipped",
+            VALIDATION_POLICY_QUARANTINE: f"quarantined in {QUARANTINE_FILENAME}",
+        }[self.policy]
+        lines = [f"{len(self.errors)} invalid statements {outcome}:"]
+        lines += [f"{key}: {'; '.join(errors)}" for key, errors in islice(self.errors.items(), MAX_SUMMARY_STATEMENTS)]
+        if len(self.errors) > MAX_SUMMARY_STATEMENTS:
+            lines.append(f"... and {len(self.errors) - MAX_SUMMARY_STATEMENTS} more")
+        return "\n".join(lines)
+
+    def _get_quarantine_path(self) -> str:
+        return os.path.join(get_snapshot_artifacts_directory(self.snapshot_id), QUARANTINE_FILENAME)
@@ -0,0 +1,165 @@
+import json
+
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import F, Lookup, TextField, Value
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import Cast, JSONObject
+
+from sckanner.models import ConnectivityStatement
+from sckanner.services.executor import run_in_api_executor
+from sckanner.services.ingestion.statement_validation import get_statement_field_names
+
+KNOWLEDGE_STATEMENTS_STREAM_CHUNK_SIZE = 500
+KNOWLEDGE_STATEMENTS_PAGE_MAX_LIMIT = 5000
+KNOWLEDGE_STATEMENTS_LOOKUP_MAX_SIZE = 5000
+# Fields are projected with jsonb_build_object, which takes at most 100 arguments (2 per field)
+KNOWLEDGE_STATEMENTS_MAX_FIELDS = 50
+
+
+class EqualsAny(Lookup):
+    """
+    lhs = ANY(values): values bound as a single array parameter whatever their number,
+    where IN takes one parameter per value.
+    """
+    lookup_name = "any"
+
+    def get_prep_lookup(self):
+        return Value(list(self.rhs), output_field=ArrayField(TextField()))
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} = ANY({rhs})", (*lhs_params, *rhs_params)
+
+
+def get_snapshot_statements(datasnapshot_id: int):
+    return ConnectivityStatement.objects.filter(snapshot_id=datasnapshot_id).order_by(
+        "id"
+    )
+
+
+def parse_statement_fields(fields: str):
+    """
+    Parse a comma separated list of top-level statement fields, None meaning the whole statement.
+    Fields are deduplicated, and must be fields of the statement schema.
+    """
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if len(names) > KNOWLEDGE_STATEMENTS_MAX_FIELDS:
+        raise ValueError(f"At most {KNOWLEDGE_STATEMENTS_MAX_FIELDS} statement fields can be requested")
+    invalid_names = [name for name in names if name not in get_statement_field_names()]
+    if invalid_names:
+        raise ValueError(f"Invalid statement fields: {', '.join(invalid_names)}")
+    return names or None
+
+
+def annotate_statement_json(queryset, fields=None):
+    """
+    Annotate each statement with its JSON document as text (data_json), projected
+    in Postgres to the given top-level fields with jsonb_build_object and ->.
+    Casting to text means the documents are never decoded into Python dicts and re-encoded.
+    """
+    document = (
+        JSONObject(**{name: KeyTransform(name, "document__data") for name in fields})
+        if fields
+        else F("document__data")
+    )
+    return queryset.annotate(data_json=Cast(document, output_field=TextField()))
+
+
+def get_snapshot_statements_json(datasnapshot_id: int):
+    return annotate_statement_json(get_snapshot_statements(datasnapshot_id)).values_list(
+        "data_json", flat=True
+    )
+
+
+def get_knowledge_statements_page_json(
+    statements, cursor: int = None, limit: int = 500, fields=None
+) -> bytes:
+    """
+    A page of statements (ordered by id), keyset-paginated on ConnectivityStatement.id:
+    {"items": [...], "next_cursor": <id to pass as cursor for the next page, or null>}
+    """
+    if cursor is not None:
+        statements = statements.filter(id__gt=cursor)
+    rows = list(
+        annotate_statement_json(statements, fields).values_list("id", "data_json")[: limit + 1]
+    )
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    items = ",".join(data_json for _, data_json in rows[:limit])
+    return f'{{"items":[{items}],"next_cursor":{"null" if next_cursor is None else next_cursor}}}'.encode()
+
+
+def get_knowledge_statements_by_reference_uris_json(datasnapshot_id: int, reference_uris: list, fields=None) -> bytes:
+    """
+    The statements of a snapshot with the given reference URIs, in the order requested, found in
+    a single query on the (reference_uri, snapshot) unique index, the URIs bound as one array:
+    {"items": [...], "missing": [<reference URIs without a statement>]}
+    """
+    reference_uris = list(dict.fromkeys(reference_uris))
+    rows = dict(
+        annotate_statement_json(
+            ConnectivityStatement.objects.filter(
+                EqualsAny(F("reference_uri"), reference_uris), snapshot_id=datasnapshot_id
+            ),
+            fields,
+        ).values_list("reference_uri", "data_json")
+    )
+    items = ",".join(rows[reference_uri] for reference_uri in reference_uris if reference_uri in rows)
+    missing = [reference_uri for reference_uri in reference_uris if reference_uri not in rows]
+    return f'{{"items":[{items}],"missing":{json.dumps(missing)}}}'.encode()
+
+
+def iter_knowledge_statements_json(
+    datasnapshot_id: int, chunk_size: int = KNOWLEDGE_STATEMENTS_STREAM_CHUNK_SIZE
+):
+    """
+    Serialize the statements of a snapshot as a JSON array, chunk by chunk.
+    Rows are read through a server-side cursor.
+    """
+    rows = get_snapshot_statements_json(datasnapshot_id).iterator(
+        chunk_size=chunk_size
+    )
+    yield b"["
+    buffer = []
+    separator = ""
+    for data_json in rows:
+        buffer.append(separator)
+        buffer.append(data_json)
+        separator = ","
+        if len(buffer) >= 2 * chunk_size:
+            yield "".join(buffer).encode()
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer).encode()
+    yield b"]"
+
+
+async def stream_knowledge_statements_json(
+    datasnapshot_id: int, chunk_size: int = KNOWLEDGE_STATEMENTS_STREAM_CHUNK_SIZE
+):
+    """
+    Async counterpart of iter_knowledge_statements_json, used for HTTP responses:
+    under uvicorn (ASGI) Django materializes synchronous iterators before
+    sending them.
+    """
+    rows = get_snapshot_statements_json(datasnapshot_id)
+    yield b"["
+    buffer = []
+    separator = ""
+    async for data_json in rows.aiterator(chunk_size=chunk_size):
+        buffer.append(separator)
+        buffer.append(data_json)
+        separator = ","
+        if len(buffer) >= 2 * chunk_size:
+            # Encoding happens off the event loop
+            yield await run_in_api_executor(_encode_chunk, buffer)
+            buffer = []
+    if buffer:
+        yield await run_in_api_executor(_encode_chunk, buffer)
+    yield b"]"
+
+
+def _encode_chunk(buffer: list) -> bytes:
+    return "".join(buffer).encode()
@@ -0,0 +1,82 @@
+"""
+Search over the statements and anatomical entities of a snapshot: full-text search on
+the statements' labels and text, and trigram-indexed substring search (the matching of
+frontend/src/services/searchService.ts) on entity names and synonyms and reference URIs.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import F, Q
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+
+from sckanner.models import ConnectivityStatement, DataSnapshot, SnapshotEntity, StatementDocument
+from sckanner.services.ingestion.logger_service import logger
+
+SEARCH_CONFIG = "english"
+SEARCH_MAX_LIMIT = 100
+
+
+# Identifiers and labels rank above the statement text
+STATEMENT_SEARCH_VECTOR = (
+    SearchVector(
+        KeyTextTransform("curie_id", "data"),
+        KeyTextTransform("name", KeyTransform("population", "data")),
+        weight="A",
+        config=SEARCH_CONFIG,
+    )
+    + SearchVector(KeyTextTransform("statement_preview", "data"), weight="B", config=SEARCH_CONFIG)
+    + SearchVector(KeyTextTransform("knowledge_statement", "data"), weight="C", config=SEARCH_CONFIG)
+)
+
+
+def build_snapshot_search_index(snapshot: DataSnapshot):
+    """
+    Set the search vectors of the statement documents of a snapshot, in a single UPDATE.
+    Documents shared with previous snapshots already have theirs.
+    Entities are searched in the snapshot entity dictionary, see sckanner.services.snapshot_entities.
+    """
+    StatementDocument.objects.filter(statements__snapshot=snapshot, search_vector__isnull=True).update(
+        search_vector=STATEMENT_SEARCH_VECTOR
+    )
+    logger.info(f"Search vectors of snapshot {snapshot.id} set")
+
+
+def search_statements(datasnapshot_id: int, text: str, limit: int, offset: int = 0):
+    """
+    Statements whose labels or text match the words of text (web search syntax),
+    or whose reference URI contains text, best ranked first.
+    """
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    return get_search_page(
+        ConnectivityStatement.objects.filter(snapshot_id=datasnapshot_id)
+        .filter(Q(document__search_vector=query) | Q(reference_uri__icontains=text))
+        .annotate(
+            rank=SearchRank(F("document__search_vector"), query),
+            label=KeyTextTransform("statement_preview", "document__data"),
+        )
+        .order_by("-rank", "id")
+        .values("id", "reference_uri", "label", "rank"),
+        limit,
+        offset,
+    )
+
+
+def search_entities(datasnapshot_id: int, text: str, limit: int, offset: int = 0):
+    """
+    Entities whose name or synonyms contain text, closest names first.
+    """
+    return get_search_page(
+        SnapshotEntity.objects.filter(snapshot_id=datasnapshot_id)
+        .filter(Q(name__icontains=text) | Q(synonyms__icontains=text))
+        .annotate(rank=TrigramWordSimilarity(text, "name"))
+        .order_by("-rank", "name", "id")
+        .values("entity_id", "name", "synonyms", "rank"),
+        limit,
+        offset,
+    )
+
+
+def get_search_page(results, limit: int, offset: int) -> dict:
+    items = list(results[offset : offset + limit + 1])
+    return {
+        "items": items[:limit],
+        "next_offset": offset + limit if len(items) > limit else None,
+    }
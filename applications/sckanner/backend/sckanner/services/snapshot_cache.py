@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_SNAPSHOT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class SnapshotCache:
+    """
+    Bounded in-process LRU cache for data derived from snapshots
+    (decoded statements, encoded payloads, ...), evicting by total size.
+
+    Keys are tuples starting with the snapshot id, so all the entries of a snapshot
+    can be invalidated at once. Callers also put the snapshot content hash in the key:
+    snapshots are ingested by another process, whose changes never reach this cache
+    through signals.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size_bytes: int):
+        if size_bytes > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, size_bytes)
+            self._size_bytes += size_bytes
+            while self._size_bytes > self.max_bytes:
+                evicted_key = next(iter(self._entries))
+                self._discard(evicted_key)
+                self.evictions += 1
+
+    def get_or_set(self, key, factory, size_of=len):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value, size_of(value))
+        return value
+
+    def invalidate_snapshot(self, datasnapshot_id: int):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == datasnapshot_id]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size_bytes -= entry[1]
+
+
+snapshot_cache = SnapshotCache(
+    getattr(settings, "SNAPSHOT_CACHE_MAX_BYTES", DEFAULT_SNAPSHOT_CACHE_MAX_BYTES)
+)
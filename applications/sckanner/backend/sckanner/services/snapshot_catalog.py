@@ -0,0 +1,67 @@
+"""
+Catalog of the visible completed snapshots with the metadata measured at ingestion,
+read in a single query and kept in each worker for SNAPSHOT_CATALOG_CACHE_SECONDS.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from sckanner.models import DataSnapshot
+
+DEFAULT_SNAPSHOT_CATALOG_CACHE_SECONDS = 60
+
+_lock = threading.Lock()
+_catalog = None
+_catalog_expires = 0.0
+
+
+def get_snapshot_catalog() -> list:
+    global _catalog, _catalog_expires
+    with _lock:
+        if _catalog is not None and time.monotonic() < _catalog_expires:
+            return _catalog
+    catalog = build_snapshot_catalog()
+    with _lock:
+        _catalog = catalog
+        _catalog_expires = time.monotonic() + getattr(
+            settings, "SNAPSHOT_CATALOG_CACHE_SECONDS", DEFAULT_SNAPSHOT_CATALOG_CACHE_SECONDS
+        )
+    return catalog
+
+
+def invalidate_snapshot_catalog():
+    global _catalog
+    with _lock:
+        _catalog = None
+
+
+def build_snapshot_catalog() -> list:
+    # Snapshots without an A-B-via-C file are left out, like in /datasnapshots
+    storage = DataSnapshot._meta.get_field("a_b_via_c_json_file").storage
+    snapshots = (
+        DataSnapshot.objects.completed()
+        .exclude(a_b_via_c_json_file__isnull=True)
+        .exclude(a_b_via_c_json_file="")
+        .values(
+            "id",
+            "timestamp",
+            "source_id",
+            "source__name",
+            "version",
+            "a_b_via_c_json_file",
+            "default",
+            "content_hash",
+            "statement_count",
+            "payload_sizes",
+            "ingestion_duration",
+        )
+    )
+    catalog = []
+    for snapshot in snapshots:
+        snapshot["source"] = snapshot.pop("source__name")
+        snapshot["a_b_via_c_json_file"] = storage.url(snapshot["a_b_via_c_json_file"])
+        if snapshot["ingestion_duration"] is not None:
+            snapshot["ingestion_duration"] = snapshot["ingestion_duration"].total_seconds()
+        catalog.append(snapshot)
+    return catalog
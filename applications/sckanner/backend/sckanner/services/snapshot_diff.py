@@ -0,0 +1,72 @@
+"""
+Differences between the statements of two snapshots, matched by reference URI:
+statements added to and removed from the base snapshot, and statements whose
+document changed, with the top-level fields that differ.
+"""
+import sys
+
+from django.db.models import Exists, F, OuterRef, Subquery
+
+from sckanner.models import ConnectivityStatement, DataSnapshot
+from sckanner.services.snapshot_cache import snapshot_cache
+
+
+def get_snapshot_diff(base: DataSnapshot, other: DataSnapshot) -> dict:
+    """
+    The diff of two snapshots, kept in the worker's snapshot cache.
+    """
+    return snapshot_cache.get_or_set(
+        (base.id, base.content_hash, "diff", other.id, other.content_hash),
+        lambda: compute_snapshot_diff(base.id, other.id),
+        size_of=get_snapshot_diff_size,
+    )
+
+
+def compute_snapshot_diff(base_id: int, other_id: int) -> dict:
+    """
+    Statements are matched with correlated subqueries on (reference_uri, snapshot),
+    which the unique index of ConnectivityStatement answers, so only the base documents
+    of modified statements are read, to compare their fields.
+    Statements without a reference URI cannot be matched and are left out.
+    """
+
+    def matching(snapshot_id):
+        return ConnectivityStatement.objects.filter(snapshot_id=snapshot_id, reference_uri=OuterRef("reference_uri"))
+
+    def statements(snapshot_id):
+        return ConnectivityStatement.objects.filter(snapshot_id=snapshot_id, reference_uri__isnull=False).order_by(
+            "reference_uri"
+        )
+
+    added = statements(other_id).filter(~Exists(matching(base_id))).values_list("reference_uri", flat=True)
+    removed = statements(base_id).filter(~Exists(matching(other_id))).values_list("reference_uri", flat=True)
+    modified = (
+        statements(other_id)
+        .annotate(base_document_id=Subquery(matching(base_id).values("document_id")[:1]))
+        .filter(base_document_id__isnull=False)
+        .exclude(base_document_id=F("document_id"))
+        .annotate(base_data=Subquery(matching(base_id).values("document__data")[:1]))
+        .values_list("reference_uri", "base_data", "document__data")
+    )
+    return {
+        "base_id": base_id,
+        "other_id": other_id,
+        "added": list(added),
+        "removed": list(removed),
+        "modified": [
+            {"reference_uri": reference_uri, "fields": get_changed_fields(base_data, data)}
+            for reference_uri, base_data, data in modified.iterator()
+        ],
+    }
+
+
+def get_changed_fields(base_data: dict, data: dict) -> list:
+    return sorted(field for field in base_data.keys() | data.keys() if base_data.get(field) != data.get(field))
+
+
+def get_snapshot_diff_size(diff: dict) -> int:
+    # Rough size of the reference URIs and field names held by a diff
+    return sum(sys.getsizeof(reference_uri) for reference_uri in diff["added"] + diff["removed"]) + sum(
+        sys.getsizeof(change["reference_uri"]) + sum(sys.getsizeof(field) for field in change["fields"])
+        for change in diff["modified"]
+    )
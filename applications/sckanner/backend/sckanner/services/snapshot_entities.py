@@ -0,0 +1,167 @@
+"""
+Dictionary of the anatomical entities of a snapshot, and the compact statements payload
+where statements reference its entities by position instead of repeating them:
+
+    {"entities": [<entity>, ...], "statements": [<statement>, ...]}
+
+In the statements, origins and the anatomical_entities and from_entities of vias and
+destinations are lists of positions in entities. The dictionary has the first copy of each
+entity: copies differing from it (other names or synonyms) stay inline in the statements.
+"""
+import json
+
+from django.db import transaction
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from sckanner.models import ConnectivityStatement, DataSnapshot, SnapshotEntity
+from sckanner.services.executor import run_in_api_executor
+from sckanner.services.ingestion.logger_service import logger
+from sckanner.services.statement_fields import get_anatomical_entity_id, get_anatomical_entity_name
+
+SNAPSHOT_ENTITIES_BATCH_SIZE = 1000
+COMPACT_STREAM_CHUNK_SIZE = 500
+
+
+def iter_statement_entities(data: dict):
+    yield from data.get("origins") or []
+    for key in ("vias", "destinations"):
+        for item in data.get(key) or []:
+            yield from item.get("anatomical_entities") or []
+            yield from item.get("from_entities") or []
+
+
+@transaction.atomic
+def build_snapshot_entities(snapshot: DataSnapshot):
+    """
+    Store the anatomical entities referenced by the statements of a snapshot,
+    in order of first appearance, logging the entities whose copies differ.
+    """
+    SnapshotEntity.objects.filter(snapshot=snapshot).delete()
+    entities = {}
+    differing_ids = set()
+    statements = ConnectivityStatement.objects.filter(snapshot=snapshot).order_by("id").values_list("document__data", flat=True)
+    for data in statements.iterator(chunk_size=SNAPSHOT_ENTITIES_BATCH_SIZE):
+        for entity in iter_statement_entities(data):
+            entity_id = get_anatomical_entity_id(entity)
+            if entity_id and entity_id not in entities:
+                entities[entity_id] = SnapshotEntity(
+                    snapshot=snapshot,
+                    entity_id=entity_id,
+                    name=get_anatomical_entity_name(entity),
+                    synonyms=entity.get("synonyms") or "",
+                    data=entity,
+                )
+            elif entity_id and entities[entity_id].data != entity:
+                differing_ids.add(entity_id)
+    if differing_ids:
+        logger.warning(
+            f"Entities of snapshot {snapshot.id} with differing copies, kept inline in the compact payload: "
+            f"{len(differing_ids)} ({', '.join(sorted(differing_ids)[:10])})"
+        )
+    SnapshotEntity.objects.bulk_create(entities.values(), batch_size=SNAPSHOT_ENTITIES_BATCH_SIZE)
+    logger.info(f"Entities of snapshot {snapshot.id} stored: {len(entities)}")
+
+
+def get_snapshot_entities_json(datasnapshot_id: int):
+    # values() rather than values_list(): the latter's iterable runs its query outside
+    # of the sync_to_async wrapper of aiterator()
+    return (
+        SnapshotEntity.objects.filter(snapshot_id=datasnapshot_id)
+        .order_by("id")
+        .annotate(data_json=Cast("data", output_field=TextField()))
+        .values("entity_id", "data_json")
+    )
+
+
+def compact_statement(data: dict, entity_positions: dict, entities: list) -> dict:
+    """
+    Copy of a statement with its entities replaced by their positions in the dictionary.
+    Entities missing from the dictionary, or differing from its copy, stay inline.
+    """
+
+    def compact_entity(entity):
+        position = entity_positions.get(get_anatomical_entity_id(entity))
+        return position if position is not None and entities[position] == entity else entity
+
+    def compact_entities(items):
+        return [compact_entity(entity) for entity in items or []]
+
+    compacted = dict(data)
+    if "origins" in data:
+        compacted["origins"] = compact_entities(data["origins"])
+    for key in ("vias", "destinations"):
+        if key in data:
+            compacted[key] = [
+                {
+                    **item,
+                    "anatomical_entities": compact_entities(item.get("anatomical_entities")),
+                    "from_entities": compact_entities(item.get("from_entities")),
+                }
+                for item in data[key] or []
+            ]
+    return compacted
+
+
+def iter_compact_knowledge_statements_json(datasnapshot_id: int, chunk_size: int = COMPACT_STREAM_CHUNK_SIZE):
+    """
+    Serialize the compact payload of a snapshot, chunk by chunk.
+    """
+    entity_positions = {}
+    entities_json = []
+    for entity in get_snapshot_entities_json(datasnapshot_id).iterator(chunk_size=chunk_size):
+        entity_positions[entity["entity_id"]] = len(entity_positions)
+        entities_json.append(entity["data_json"])
+    entities = [json.loads(entity_json) for entity_json in entities_json]
+    yield f'{{"entities":[{",".join(entities_json)}],"statements":['.encode()
+
+    statements = (
+        ConnectivityStatement.objects.filter(snapshot_id=datasnapshot_id).order_by("id").values_list("document__data", flat=True)
+    )
+    buffer = []
+    separator = ""
+    for data in statements.iterator(chunk_size=chunk_size):
+        buffer.append(data)
+        if len(buffer) >= chunk_size:
+            yield _encode_compact_statements(buffer, entity_positions, entities, separator)
+            buffer = []
+            separator = ","
+    if buffer:
+        yield _encode_compact_statements(buffer, entity_positions, entities, separator)
+    yield b"]}"
+
+
+async def stream_compact_knowledge_statements_json(datasnapshot_id: int, chunk_size: int = COMPACT_STREAM_CHUNK_SIZE):
+    """
+    Async counterpart of iter_compact_knowledge_statements_json, for snapshots whose payload was not written.
+    """
+    entity_positions = {}
+    entities_json = []
+    async for entity in get_snapshot_entities_json(datasnapshot_id).aiterator(chunk_size=chunk_size):
+        entity_positions[entity["entity_id"]] = len(entity_positions)
+        entities_json.append(entity["data_json"])
+    entities = [json.loads(entity_json) for entity_json in entities_json]
+    yield f'{{"entities":[{",".join(entities_json)}],"statements":['.encode()
+
+    statements = (
+        ConnectivityStatement.objects.filter(snapshot_id=datasnapshot_id).order_by("id").values_list("document__data", flat=True)
+    )
+    buffer = []
+    separator = ""
+    async for data in statements.aiterator(chunk_size=chunk_size):
+        buffer.append(data)
+        if len(buffer) >= chunk_size:
+            # Compaction and encoding happen off the event loop
+            yield await run_in_api_executor(_encode_compact_statements, buffer, entity_positions, entities, separator)
+            buffer = []
+            separator = ","
+    if buffer:
+        yield await run_in_api_executor(_encode_compact_statements, buffer, entity_positions, entities, separator)
+    yield b"]}"
+
+
+def _encode_compact_statements(statements: list, entity_positions: dict, entities: list, separator: str) -> bytes:
+    encoded = ",".join(
+        json.dumps(compact_statement(data, entity_positions, entities), separators=(",", ":")) for data in statements
+    )
+    return (separator + encoded).encode()
@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import os
+import shutil
+
+import brotli
+
+from sckanner.services.binary_payloads import iter_arrow_payload, iter_msgpack_payload
+from sckanner.services.datasnapshot import get_snapshot_artifacts_directory
+from sckanner.services.executor import run_in_api_executor
+from sckanner.services.knowledge_statements import iter_knowledge_statements_json
+from sckanner.services.snapshot_entities import iter_compact_knowledge_statements_json
+from sckanner.services.ingestion.logger_service import logger
+
+PAYLOAD_FILE_READ_CHUNK_SIZE = 256 * 1024
+
+# Payload format -> (file name, media type), see sckanner.services.snapshot_entities for
+# the compact format and sckanner.services.binary_payloads for the binary ones
+PAYLOAD_FORMATS = {
+    "full": ("knowledge-statements.json", "application/json"),
+    "compact": ("knowledge-statements.compact.json", "application/json"),
+    "msgpack": ("knowledge-statements.msgpack", "application/msgpack"),
+    "arrow": ("knowledge-statements.arrow", "application/vnd.apache.arrow.stream"),
+}
+# Formats clients get by asking for their media type in Accept, in order of preference.
+# Arrow is not one of them: it only has some of the fields, and is asked for with format=arrow
+BINARY_PAYLOAD_FORMATS = ("msgpack",)
+
+# Content-Encoding -> file suffix, in order of preference when serving
+PAYLOAD_ENCODINGS = {
+    "br": ".br",
+    "gzip": ".gz",
+    "identity": "",
+}
+
+
+def get_snapshot_payload_path(datasnapshot_id: int, encoding: str = "identity", payload_format: str = "full") -> str:
+    return os.path.join(
+        get_snapshot_artifacts_directory(datasnapshot_id),
+        PAYLOAD_FORMATS[payload_format][0] + PAYLOAD_ENCODINGS[encoding],
+    )
+
+
+def write_snapshot_payloads(snapshot):
+    """
+    Write the serialized /knowledge-statements payloads of a snapshot in each format,
+    plus their gzip and brotli variants, on the persistent volume.
+    Files are written next to their final path and renamed, so readers never see a partial payload.
+    """
+    os.makedirs(get_snapshot_artifacts_directory(snapshot.id), exist_ok=True)
+    payload_chunks = {
+        "full": iter_knowledge_statements_json,
+        "compact": iter_compact_knowledge_statements_json,
+        "msgpack": iter_msgpack_payload,
+        "arrow": iter_arrow_payload,
+    }
+    for payload_format in PAYLOAD_FORMATS:
+        payload_path = get_snapshot_payload_path(snapshot.id, payload_format=payload_format)
+        _write_atomically(payload_path, _write_identity_payload, payload_chunks[payload_format](snapshot.id))
+        _write_atomically(
+            get_snapshot_payload_path(snapshot.id, "gzip", payload_format), _write_gzip_payload, payload_path
+        )
+        _write_atomically(
+            get_snapshot_payload_path(snapshot.id, "br", payload_format), _write_brotli_payload, payload_path
+        )
+        logger.info(
+            f"Knowledge statements {payload_format} payload written for snapshot {snapshot.id}: "
+            + ", ".join(
+                f"{encoding}={os.path.getsize(get_snapshot_payload_path(snapshot.id, encoding, payload_format))} bytes"
+                for encoding in PAYLOAD_ENCODINGS
+            )
+        )
+
+
+def get_snapshot_payload_sizes(datasnapshot_id: int) -> dict:
+    """
+    Byte size of each payload file of a snapshot, by format and encoding.
+    """
+    sizes = {}
+    for payload_format in PAYLOAD_FORMATS:
+        for encoding in PAYLOAD_ENCODINGS:
+            path = get_snapshot_payload_path(datasnapshot_id, encoding, payload_format)
+            if os.path.exists(path):
+                sizes.setdefault(payload_format, {})[encoding] = os.path.getsize(path)
+    return sizes
+
+
+def get_snapshot_payload_hashes(datasnapshot_id: int) -> dict:
+    """
+    SHA-256 of each payload file of a snapshot, by format and encoding.
+    Each file is its own representation, validated by its own hash.
+    """
+    hashes = {}
+    for payload_format in PAYLOAD_FORMATS:
+        for encoding in PAYLOAD_ENCODINGS:
+            path = get_snapshot_payload_path(datasnapshot_id, encoding, payload_format)
+            if os.path.exists(path):
+                payload_hash = hashlib.sha256()
+                with open(path, "rb") as payload_file:
+                    while chunk := payload_file.read(PAYLOAD_FILE_READ_CHUNK_SIZE):
+                        payload_hash.update(chunk)
+                hashes.setdefault(payload_format, {})[encoding] = payload_hash.hexdigest()
+    return hashes
+
+
+def get_payload_media_type(payload_format: str) -> str:
+    return PAYLOAD_FORMATS[payload_format][1]
+
+
+def _get_header_qualities(header: str) -> dict:
+    # value -> quality of a header like Accept or Accept-Encoding
+    qualities = {}
+    for item in (header or "").split(","):
+        value, _, params = item.strip().partition(";")
+        value = value.strip().lower()
+        if not value:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[value] = quality
+    return qualities
+
+
+def get_accepted_binary_format(accept: str):
+    """
+    The binary payload format whose media type an Accept header explicitly asks for, if any,
+    with a higher quality than JSON. Wildcards do not count for binary formats, but do for
+    JSON when it is not listed: JSON stays the default representation.
+    """
+    qualities = _get_header_qualities(accept)
+    json_quality = qualities.get("application/json", qualities.get("application/*", qualities.get("*/*", 0.0)))
+    accepted = [
+        payload_format
+        for payload_format in BINARY_PAYLOAD_FORMATS
+        if qualities.get(get_payload_media_type(payload_format), 0.0) > json_quality
+    ]
+    return max(accepted, key=lambda payload_format: qualities[get_payload_media_type(payload_format)], default=None)
+
+
+def is_encoding_accepted(accept_encoding: str, encoding: str) -> bool:
+    qualities = _get_header_qualities(accept_encoding)
+    return qualities.get(encoding, qualities.get("*", 0.0)) > 0
+
+
+def get_accepted_encoding(accept_encoding: str) -> str:
+    """
+    Pick the preferred payload encoding allowed by an Accept-Encoding header.
+    """
+    qualities = _get_header_qualities(accept_encoding)
+    for encoding in PAYLOAD_ENCODINGS:
+        if encoding == "identity":
+            break
+        if qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def find_snapshot_payload(datasnapshot_id: int, accept_encoding: str, payload_format: str = "full"):
+    """
+    Return (path, encoding) of the payload variant to serve for the request,
+    or None when no payload was generated for the snapshot.
+    """
+    encoding = get_accepted_encoding(accept_encoding)
+    for candidate in (encoding, "identity"):
+        path = get_snapshot_payload_path(datasnapshot_id, candidate, payload_format)
+        if os.path.exists(path):
+            return path, candidate
+    return None
+
+
+def read_payload_file(path: str) -> bytes:
+    with open(path, "rb") as payload_file:
+        return payload_file.read()
+
+
+async def stream_payload_file(path: str, chunk_size: int = PAYLOAD_FILE_READ_CHUNK_SIZE):
+    # FileResponse is read completely into memory before sending under ASGI
+    with open(path, "rb") as payload_file:
+        while chunk := await run_in_api_executor(payload_file.read, chunk_size):
+            yield chunk
+
+
+def _write_atomically(path: str, writer, source):
+    tmp_path = f"{path}.tmp"
+    try:
+        writer(tmp_path, source)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_identity_payload(path: str, chunks):
+    with open(path, "wb") as payload_file:
+        for chunk in chunks:
+            payload_file.write(chunk)
+
+
+def _write_gzip_payload(path: str, source_path: str):
+    with open(source_path, "rb") as source_file, open(path, "wb") as payload_file:
+        # mtime=0 keeps the compressed bytes identical across runs
+        with gzip.GzipFile(filename="", mode="wb", fileobj=payload_file, compresslevel=9, mtime=0) as gzip_file:
+            shutil.copyfileobj(source_file, gzip_file, PAYLOAD_FILE_READ_CHUNK_SIZE)
+
+
+def _write_brotli_payload(path: str, source_path: str):
+    compressor = brotli.Compressor(quality=11)
+    with open(source_path, "rb") as source_file, open(path, "wb") as payload_file:
+        while chunk := source_file.read(PAYLOAD_FILE_READ_CHUNK_SIZE):
+            payload_file.write(compressor.process(chunk))
+        payload_file.write(compressor.finish())
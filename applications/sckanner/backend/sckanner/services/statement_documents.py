@@ -0,0 +1,94 @@
+"""
+Content-addressed storage of the statement documents: each distinct document is stored
+once in StatementDocument, keyed by the SHA-256 of its normalized JSON
+(see sckanner.services.statement_fields.get_statement_content_hash), and the
+ConnectivityStatement rows of the snapshots containing it reference it.
+Ingesting a new version of a source only stores the documents that changed.
+
+Ingestions and the deletion of orphan documents are serialized with a PostgreSQL advisory
+lock, held until the end of their transactions: ingestions share it, so a document an
+ingestion references is never deleted before the ingestion commits.
+"""
+from django.db import connection
+from django.db.models import Count, Exists, Max, OuterRef
+
+from sckanner.models import ConnectivityStatement, StatementDocument
+from sckanner.services.ingestion.logger_service import logger
+
+# Key of the advisory lock between ingestions and the deletion of orphan documents
+STATEMENT_DOCUMENTS_LOCK_ID = 0x5C4A11E7D0C5
+ORPHAN_DOCUMENTS_DELETE_BATCH_SIZE = 5000
+
+
+def lock_statement_documents(shared: bool = True):
+    """
+    Take the statement documents lock until the end of the current transaction, shared by
+    ingestions and exclusive for deleting orphan documents. No-op on other databases.
+    """
+    if connection.vendor != "postgresql":
+        return
+    function = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {function}(%s)", [STATEMENT_DOCUMENTS_LOCK_ID])
+
+
+def save_statement_documents(documents: dict) -> dict:
+    """
+    Store the documents, given by content hash, that are not stored yet,
+    and return the ids of all of them by content hash.
+    """
+    document_ids = dict(
+        StatementDocument.objects.filter(content_hash__in=documents.keys()).values_list("content_hash", "id")
+    )
+    new_hashes = [content_hash for content_hash in documents if content_hash not in document_ids]
+    if new_hashes:
+        # Conflicts are documents stored by a concurrent ingestion in the meantime
+        StatementDocument.objects.bulk_create(
+            [StatementDocument(content_hash=content_hash, data=documents[content_hash]) for content_hash in new_hashes],
+            ignore_conflicts=True,
+        )
+        document_ids.update(
+            StatementDocument.objects.filter(content_hash__in=new_hashes).values_list("content_hash", "id")
+        )
+    return document_ids
+
+
+def get_statement_content_hashes(snapshot) -> dict:
+    """
+    Content hashes of the documents of the statements of a snapshot, by reference URI.
+    Reference URIs shared by several statements of the snapshot are left out.
+    """
+    return dict(
+        ConnectivityStatement.objects.filter(snapshot=snapshot, reference_uri__isnull=False)
+        .values("reference_uri")
+        .annotate(statement_count=Count("id"), content_hash=Max("document__content_hash"))
+        .filter(statement_count=1)
+        .values_list("reference_uri", "content_hash")
+    )
+
+
+def get_snapshot_document_ids(snapshot) -> set:
+    """
+    Ids of the documents of the statements of a snapshot.
+    """
+    return set(ConnectivityStatement.objects.filter(snapshot=snapshot).values_list("document_id", flat=True).distinct())
+
+
+def delete_orphan_statement_documents(document_ids) -> int:
+    """
+    Delete the documents among document_ids no snapshot references anymore,
+    and return how many were deleted. Waits for running ingestions to commit.
+    """
+    lock_statement_documents(shared=False)
+    document_ids = list(document_ids)
+    deleted = 0
+    for start in range(0, len(document_ids), ORPHAN_DOCUMENTS_DELETE_BATCH_SIZE):
+        batch_deleted, _ = (
+            StatementDocument.objects.filter(id__in=document_ids[start : start + ORPHAN_DOCUMENTS_DELETE_BATCH_SIZE])
+            .filter(~Exists(ConnectivityStatement.objects.filter(document=OuterRef("pk"))))
+            .only("id")
+            .delete()
+        )
+        deleted += batch_deleted
+    logger.info(f"Orphan statement documents deleted: {deleted}")
+    return deleted
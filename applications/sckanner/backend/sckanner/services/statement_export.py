@@ -0,0 +1,130 @@
+"""
+CSV export of statements, with the columns and cell formatting of generateCsvService
+in frontend/src/services/csvService.ts, streamed row by row from a database cursor.
+"""
+import csv
+import io
+import zlib
+
+from sckanner.services.executor import run_in_api_executor
+from sckanner.services.statement_fields import get_anatomical_entity_id, get_anatomical_entity_name
+
+STATEMENT_EXPORT_CHUNK_SIZE = 200
+
+
+def _clean(value) -> str:
+    return str(value).replace("\n", ". ").replace("\r", "").replace("\t", " ").replace(",", ";")
+
+
+def _format_entity(entity: dict) -> str:
+    return f"URI: {get_anatomical_entity_id(entity)}; Label: {get_anatomical_entity_name(entity)}"
+
+
+def _format_path(items: list) -> str:
+    return _clean(
+        " & ".join(
+            "[ ("
+            + " & ".join(_format_entity(entity) for entity in item.get("anatomical_entities") or [])
+            + f"); Type: {item.get('type')}; From: "
+            + "; ".join(get_anatomical_entity_id(entity) for entity in item.get("from_entities") or [])
+            + " ]"
+            for item in items or []
+        )
+    )
+
+
+def _format_list(values: list) -> str:
+    return _clean(" & ".join(f"[ {value} ]" for value in values or []))
+
+
+def _format_sex(sex: dict) -> str:
+    sex = sex or {}
+    if sex.get("name") and sex.get("ontology_uri"):
+        return f"[ URI: {sex['ontology_uri']}; Label: {sex['name']} ]"
+    return ""
+
+
+STATEMENT_EXPORT_COLUMNS = {
+    "id": lambda data: _clean(data.get("reference_uri")),
+    "statement_preview": lambda data: _clean(data.get("statement_preview") or ""),
+    "provenances": lambda data: _format_list(
+        provenance.get("uri") or "" for provenance in data.get("provenances") or []
+    ),
+    "phenotype": lambda data: _clean((data.get("phenotype") or {}).get("name") or ""),
+    "laterality": lambda data: _clean(data.get("laterality") or ""),
+    "projection": lambda data: _clean(data.get("projection") or ""),
+    "circuit_type": lambda data: _clean(data.get("circuit_type") or ""),
+    "sex": lambda data: _format_sex(data.get("sex")),
+    "species": lambda data: " & ".join(
+        f"[ URI: {species.get('ontology_uri')}; Label: {species.get('name')} ]" for species in data.get("species") or []
+    ),
+    "apinatomy": lambda data: _clean(data.get("apinatomy_model") or ""),
+    "journey": lambda data: _format_list(data.get("journey")),
+    "origins": lambda data: _clean(
+        " & ".join(
+            f"[ URIs: {get_anatomical_entity_id(origin)}; Label: {get_anatomical_entity_name(origin)} ]"
+            for origin in data.get("origins") or []
+        )
+    ),
+    "vias": lambda data: _format_path(data.get("vias")),
+    "destinations": lambda data: _format_path(data.get("destinations")),
+    "statement_alerts": lambda data: _clean(
+        " & ".join(
+            f"[ Alert: {alert.get('alert')}; Text: {alert.get('text')} ]" for alert in data.get("statement_alerts") or []
+        )
+    ),
+}
+
+
+def parse_export_columns(columns: str) -> list:
+    """
+    Parse a comma separated list of export columns, None or empty meaning all of them.
+    """
+    if not columns:
+        return list(STATEMENT_EXPORT_COLUMNS)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    invalid_names = [name for name in names if name not in STATEMENT_EXPORT_COLUMNS]
+    if invalid_names:
+        raise ValueError(f"Invalid export columns: {', '.join(invalid_names)}")
+    return list(dict.fromkeys(names)) or list(STATEMENT_EXPORT_COLUMNS)
+
+
+def _encode_csv_rows(rows: list) -> bytes:
+    # Every value quoted and quotes doubled, like the frontend export
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_statements_csv(statements: list, columns: list) -> bytes:
+    return _encode_csv_rows([[STATEMENT_EXPORT_COLUMNS[column](data) for column in columns] for data in statements])
+
+
+async def stream_statements_csv(statements, columns: list, chunk_size: int = STATEMENT_EXPORT_CHUNK_SIZE):
+    """
+    The header row, then the statements (a queryset) as CSV rows, chunk by chunk.
+    """
+    yield _encode_csv_rows([columns])
+    buffer = []
+    async for data in statements.values_list("document__data", flat=True).aiterator(chunk_size=chunk_size):
+        buffer.append(data)
+        if len(buffer) >= chunk_size:
+            # Formatting happens off the event loop
+            yield await run_in_api_executor(_encode_statements_csv, buffer, columns)
+            buffer = []
+    if buffer:
+        yield await run_in_api_executor(_encode_statements_csv, buffer, columns)
+
+
+async def gzip_stream(chunks):
+    """
+    Gzip an async byte stream, flushing each chunk so the client receives it right away.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        yield await run_in_api_executor(_compress_chunk, compressor, chunk)
+    yield compressor.flush()
+
+
+def _compress_chunk(compressor, chunk: bytes) -> bytes:
+    return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
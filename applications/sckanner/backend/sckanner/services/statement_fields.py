@@ -0,0 +1,92 @@
+"""
+Values of a statement JSON document as the explorer frontend sees them
+(see mapApiResponseToKnowledgeStatements in frontend/src/services/mappers.ts).
+"""
+import hashlib
+import json
+
+
+def get_anatomical_entity_id(entity: dict) -> str:
+    region_layer = entity.get("region_layer")
+    if region_layer:
+        return f"{region_layer['region']['ontology_uri']} ({region_layer['layer']['ontology_uri']})"
+    return (entity.get("simple_entity") or {}).get("ontology_uri") or ""
+
+
+def get_anatomical_entity_name(entity: dict) -> str:
+    region_layer = entity.get("region_layer")
+    if region_layer:
+        return f"{region_layer['region']['name']} ({region_layer['layer']['name']})"
+    return (entity.get("simple_entity") or {}).get("name") or ""
+
+
+def get_anatomical_entity_uris(entity: dict) -> list:
+    """
+    The ontology URIs an entity is made of: its own, or the region and layer ones.
+    """
+    region_layer = entity.get("region_layer")
+    if region_layer:
+        return [region_layer["region"]["ontology_uri"], region_layer["layer"]["ontology_uri"]]
+    return [get_anatomical_entity_id(entity)]
+
+
+def get_statement_phenotypes(data: dict) -> list:
+    """
+    The values the phenotype filter matches: phenotype name, circuit type and projection.
+    """
+    values = [
+        (data.get("phenotype") or {}).get("name") or "",
+        data.get("circuit_type") or "",
+        data.get("projection") or "",
+    ]
+    return list(dict.fromkeys(value for value in values if value))
+
+
+def get_statement_origins(data: dict) -> list:
+    return data.get("origins") or []
+
+
+def get_statement_vias(data: dict) -> list:
+    return [entity for via in data.get("vias") or [] for entity in via.get("anatomical_entities") or []]
+
+
+def get_statement_destinations(data: dict) -> list:
+    return [
+        entity
+        for destination in data.get("destinations") or []
+        for entity in destination.get("anatomical_entities") or []
+    ]
+
+
+def extract_statement_filter_fields(data: dict) -> dict:
+    """
+    The ConnectivityStatement columns extracted from the JSON document to filter statements.
+    """
+    destination_ids = []
+    for entity in get_statement_destinations(data):
+        destination_ids.append(get_anatomical_entity_id(entity))
+        # The explorer matches end organs as substrings of the destination ids,
+        # so region/layer destinations also match their region and layer URIs
+        if entity.get("region_layer"):
+            destination_ids.extend(get_anatomical_entity_uris(entity))
+    return {
+        "phenotypes": get_statement_phenotypes(data),
+        "apinatomy": data.get("apinatomy_model") or "",
+        "species_ids": _unique(species.get("ontology_uri") for species in data.get("species") or []),
+        "origin_ids": _unique(get_anatomical_entity_id(entity) for entity in get_statement_origins(data)),
+        "via_ids": _unique(get_anatomical_entity_id(entity) for entity in get_statement_vias(data)),
+        "destination_ids": _unique(destination_ids),
+    }
+
+
+def get_statement_content_hash(data: dict) -> str:
+    """
+    SHA-256 of the statement JSON document with sorted keys and no whitespace,
+    so documents differing only in key order or formatting hash the same.
+    """
+    normalized = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def _unique(values) -> list:
+    return list(dict.fromkeys(value for value in values if value))
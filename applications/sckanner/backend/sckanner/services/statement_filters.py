@@ -0,0 +1,74 @@
+import hashlib
+import json
+
+from django.db.models import Q
+
+from sckanner.services.hierarchy import SnapshotHierarchy, expand_entity_ids
+
+# ConnectivityStatement columns the filters match, see sckanner.services.statement_fields
+STATEMENT_FILTER_COLUMNS = ("phenotypes", "apinatomy", "species_ids", "origin_ids", "via_ids", "destination_ids")
+
+
+def has_statement_filters(filters) -> bool:
+    return any(
+        (filters.phenotype, filters.apinatomy, filters.species, filters.origin, filters.via, filters.entity, filters.end_organ)
+    )
+
+
+def get_normalized_filters_hash(filters, **params) -> str:
+    """
+    SHA-256 of filters and extra request params, with the values of each list
+    deduplicated and sorted, so equivalent selections get the same hash.
+    """
+    normalized = {
+        name: sorted(set(value)) if isinstance(value, (list, tuple)) else value
+        for name, value in {**filters.model_dump(), **params}.items()
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def get_statement_filter_conditions(filters, datasnapshot_id: int, hierarchy: SnapshotHierarchy = None) -> list:
+    """
+    The explorer filters as conditions on the statement filter columns, with the semantics of
+    filterKnowledgeStatements in frontend/src/services/heatmapService.ts: a list of
+    conditions to AND, each one a list of (column, values) to OR, a statement matching
+    (column, values) when its column holds one of values.
+    Hierarchy nodes selected as origin, via or entity stand for their leaf descendants.
+    The hierarchy (for its end organs) is only needed by the end_organ filter.
+    """
+    conditions = []
+    if filters.phenotype:
+        conditions.append([("phenotypes", filters.phenotype)])
+    if filters.apinatomy:
+        conditions.append([("apinatomy", filters.apinatomy)])
+    if filters.species:
+        conditions.append([("species_ids", filters.species)])
+    if filters.origin:
+        conditions.append([("origin_ids", expand_entity_ids(datasnapshot_id, filters.origin))])
+    if filters.via:
+        conditions.append([("via_ids", expand_entity_ids(datasnapshot_id, filters.via))])
+    if filters.entity:
+        entity_ids = expand_entity_ids(datasnapshot_id, filters.entity)
+        conditions.append([("destination_ids", entity_ids), ("via_ids", entity_ids), ("origin_ids", entity_ids)])
+    if filters.end_organ:
+        conditions.append([("destination_ids", hierarchy.get_end_organ_keys(filters.end_organ))])
+    return conditions
+
+
+def get_statement_filters_q(filters, datasnapshot_id: int, hierarchy: SnapshotHierarchy = None) -> Q:
+    """
+    Q for the statements matching the explorer filters.
+    Every condition is an overlap (&&) on a GIN indexed column, or an IN on apinatomy.
+    """
+    q = Q()
+    for condition in get_statement_filter_conditions(filters, datasnapshot_id, hierarchy):
+        alternatives = Q()
+        for column, values in condition:
+            lookup = "in" if column == "apinatomy" else "overlap"
+            alternatives |= Q(**{f"{column}__{lookup}": values})
+        q &= alternatives
+    return q
+
+
+def filter_statements(statements, filters, datasnapshot_id: int, hierarchy: SnapshotHierarchy = None):
+    return statements.filter(get_statement_filters_q(filters, datasnapshot_id, hierarchy))
@@ -0,0 +1,89 @@
+"""
+Secondary (summary) heatmap of the explorer: for an end organ and a hierarchy node,
+unique statements per row, sub organ and phenotype, like calculateSecondaryConnections
+and getSecondaryHeatmapData in frontend/src/services/summaryHeatmapService.ts.
+Computed from the heatmap matrix and the bitmap index of the snapshot.
+"""
+import numpy as np
+
+from sckanner.models import DataSnapshot
+from sckanner.services.bitmap_index import get_filtered_statement_mask
+from sckanner.services.heatmap import get_row_leaves, get_snapshot_heatmap_matrix, get_visible_rows
+from sckanner.services.hierarchy import get_snapshot_hierarchy
+from sckanner.services.snapshot_cache import snapshot_cache
+from sckanner.services.statement_filters import get_normalized_filters_hash
+
+# Phenotype of the statements without phenotype, circuit type and projection
+OTHER_PHENOTYPE_LABEL = "other"
+
+
+def get_summary_heatmap(snapshot: DataSnapshot, end_organ_id: str, node_id: str, expanded_ids: list, filters):
+    """
+    The summary heatmap for the explorer filters and the summary nerve filter (filters.nerve),
+    or None when the end organ or the node is not in the hierarchy.
+    Kept in the worker's snapshot cache, keyed by the normalized request.
+    """
+    filters_hash = get_normalized_filters_hash(
+        filters, end_organ_id=end_organ_id, node_id=node_id, expanded_ids=expanded_ids
+    )
+    cache_key = (snapshot.id, snapshot.content_hash, "summary_heatmap", filters_hash)
+    summary = snapshot_cache.get(cache_key)
+    if summary is None:
+        summary = compute_summary_heatmap(snapshot, end_organ_id, node_id, expanded_ids, filters)
+        if summary is not None:
+            snapshot_cache.set(cache_key, summary, get_summary_heatmap_size(summary))
+    return summary
+
+
+def compute_summary_heatmap(snapshot: DataSnapshot, end_organ_id: str, node_id: str, expanded_ids: list, filters):
+    hierarchy = get_snapshot_hierarchy(snapshot)
+    organ = hierarchy.organs.get(end_organ_id)
+    if organ is None or node_id not in hierarchy.nodes:
+        return None
+    matrix = get_snapshot_heatmap_matrix(snapshot)
+    index, mask = get_filtered_statement_mask(
+        snapshot, filters, [[("via_ids", filters.nerve)]] if filters.nerve else []
+    )
+
+    # Columns are the sub organs of the end organ, matched by id under any end organ as the frontend does
+    sub_organs = list(organ["children"].items())
+    sub_organ_index = {sub_organ_id: position for position, (sub_organ_id, _) in enumerate(sub_organs)}
+    column_groups = np.array(
+        [sub_organ_index.get(sub_organ_iri, -1) for sub_organ_iri in matrix.column_sub_organs], dtype=np.int64
+    )
+
+    # A statement counts under its phenotype, circuit type and projection, or under "other"
+    phenotypes = sorted(
+        value for column, value in zip(index.columns, index.values) if column == "phenotypes"
+    )
+    phenotype_masks = [mask & index.bits[index.row_index[("phenotypes", phenotype)]] for phenotype in phenotypes]
+    phenotype_rows = [index.row_index[("phenotypes", phenotype)] for phenotype in phenotypes]
+    phenotype_masks.append(mask & ~np.bitwise_or.reduce(index.bits[phenotype_rows + [index.empty_row]], axis=0))
+    phenotypes.append(OTHER_PHENOTYPE_LABEL)
+
+    rows = get_visible_rows(hierarchy, expanded_ids, roots=[node_id])
+    counts = matrix.count_unique_statements_by_mask(
+        get_row_leaves(hierarchy, matrix, rows),
+        column_groups,
+        len(sub_organs),
+        [index.get_statement_selection(phenotype_mask) for phenotype_mask in phenotype_masks],
+    )
+    # rows x sub organs x phenotypes, without the phenotypes counting nowhere
+    counts = np.stack(counts, axis=2) if counts else np.zeros((len(rows), len(sub_organs), 0), dtype=np.int64)
+    present = counts.sum(axis=(0, 1)) > 0
+    counts = counts[:, :, present]
+    return {
+        "columns": [{"id": sub_organ_id, "name": name} for sub_organ_id, name in sub_organs],
+        "phenotypes": [phenotype for phenotype, keep in zip(phenotypes, present) if keep],
+        "rows": [
+            {"id": row, "name": hierarchy.nodes[row]["name"], "counts": row_counts}
+            for row, row_counts in zip(rows, counts.tolist())
+        ],
+    }
+
+
+def get_summary_heatmap_size(summary: dict) -> int:
+    # Rough size: ids and names, and 8 bytes per count
+    cells = len(summary["rows"]) * len(summary["columns"]) * len(summary["phenotypes"])
+    labels = summary["columns"] + summary["rows"]
+    return 8 * cells + sum(len(label["id"]) + len(label["name"]) for label in labels)
@@ -0,0 +1,48 @@
+import shutil
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from sckanner.models import ConnectivityStatement, DataSnapshot
+from sckanner.services.datasnapshot import get_snapshot_artifacts_directory
+from sckanner.services.snapshot_cache import snapshot_cache
+from sckanner.services.snapshot_catalog import invalidate_snapshot_catalog
+from sckanner.services.statement_documents import delete_orphan_statement_documents, get_snapshot_document_ids
+
+# Sent with the snapshot_id after statements are bulk created, updated or deleted,
+# since the QuerySet bulk operations do not send the model signals.
+connectivity_statements_changed = Signal()
+
+
+@receiver(post_save, sender=DataSnapshot)
+def invalidate_saved_snapshot(sender, instance, **kwargs):
+    snapshot_cache.invalidate_snapshot(instance.id)
+    # Visibility, default flag, status or metadata may have changed
+    invalidate_snapshot_catalog()
+
+
+@receiver(pre_delete, sender=DataSnapshot)
+def collect_deleted_snapshot_documents(sender, instance, **kwargs):
+    # Only these documents may become orphans, see invalidate_deleted_snapshot
+    instance._statement_document_ids = get_snapshot_document_ids(instance)
+
+
+@receiver(post_delete, sender=DataSnapshot)
+def invalidate_deleted_snapshot(sender, instance, **kwargs):
+    snapshot_cache.invalidate_snapshot(instance.id)
+    invalidate_snapshot_catalog()
+    shutil.rmtree(get_snapshot_artifacts_directory(instance.id), ignore_errors=True)
+    # The documents of statements only the deleted snapshot had
+    delete_orphan_statement_documents(getattr(instance, "_statement_document_ids", ()))
+
+
+# NOTE: no post_delete receiver on purpose - with one, Django loads every statement
+# of a deleted snapshot to send the signal; the snapshot post_delete covers the cascade.
+@receiver(post_save, sender=ConnectivityStatement)
+def invalidate_saved_statement_snapshot(sender, instance, **kwargs):
+    snapshot_cache.invalidate_snapshot(instance.snapshot_id)
+
+
+@receiver(connectivity_statements_changed)
+def invalidate_changed_statements_snapshot(sender, snapshot_id, **kwargs):
+    snapshot_cache.invalidate_snapshot(snapshot_id)
@@ -0,0 +1,72 @@
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from sckanner.services.bitmap_index import StatementBitmapIndex
+from sckanner.tests.utils import create_snapshot, create_statement
+
+
+class StatementBitmapIndexTests(SimpleTestCase):
+    def setUp(self):
+        # 10 statements (ids 100..109), so the last byte of the bitmaps is partial
+        rows = {
+            ("species_ids", "rat"): [0, 1, 2, 9],
+            ("species_ids", "mouse"): [2, 3],
+            ("apinatomy", "keast"): [1, 2, 3, 9],
+        }
+        bits = np.zeros((len(rows) + 1, 2), dtype=np.uint8)
+        for row, positions in enumerate(rows.values()):
+            for position in positions:
+                bits[row, position // 8] |= 1 << (position % 8)
+        self.index = StatementBitmapIndex(
+            np.arange(100, 110, dtype=np.int64),
+            np.array([column for column, _ in rows], dtype=np.str_),
+            np.array([value for _, value in rows], dtype=np.str_),
+            bits,
+        )
+
+    def test_all_statements(self):
+        self.assertEqual(self.index.get_statement_ids(self.index.all_statements()).tolist(), list(range(100, 110)))
+
+    def test_conditions_are_anded_and_values_ored(self):
+        mask = self.index.get_statement_mask([[("species_ids", ["rat", "mouse"])], [("apinatomy", ["keast"])]])
+        self.assertEqual(self.index.get_statement_ids(mask).tolist(), [101, 102, 103, 109])
+
+    def test_unknown_value_matches_nothing(self):
+        mask = self.index.get_statement_mask([[("species_ids", ["cat"])]])
+        self.assertEqual(self.index.get_statement_ids(mask).tolist(), [])
+        self.assertEqual(self.index.get_statement_mask([]).tolist(), self.index.all_statements().tolist())
+
+    def test_count_statements(self):
+        rat, mouse, keast = (self.index.row_index[key] for key in [("species_ids", "rat"), ("species_ids", "mouse"), ("apinatomy", "keast")])
+        row_groups = np.array([[rat, self.index.empty_row], [rat, mouse], [self.index.empty_row, self.index.empty_row]])
+        self.assertEqual(self.index.count_statements(row_groups).tolist(), [4, 5, 0])
+        mask = self.index.get_statement_mask([[("apinatomy", ["keast"])]])
+        self.assertEqual(self.index.count_statements(row_groups, mask).tolist(), [3, 4, 0])
+        self.assertEqual(self.index.count_statements(np.zeros((0, 2), dtype=np.int64)).tolist(), [])
+
+
+class SnapshotBitmapIndexTests(TestCase):
+    def test_index_of_snapshot_matches_its_statements(self):
+        snapshot = create_snapshot()
+        statements = [
+            create_statement(snapshot, {"reference_uri": "http://s/0", "apinatomy_model": "keast", "species": [{"ontology_uri": "rat"}]}),
+            create_statement(snapshot, {"reference_uri": "http://s/1", "apinatomy_model": "keast"}),
+            create_statement(snapshot, {"reference_uri": "http://s/2", "species": [{"ontology_uri": "rat"}, {"ontology_uri": "mouse"}]}),
+        ]
+        index = StatementBitmapIndex.from_snapshot(snapshot.id)
+        with tempfile.TemporaryDirectory() as directory:
+            index.save(f"{directory}/bits.npy", f"{directory}/keys.npz")
+            loaded = StatementBitmapIndex.load(f"{directory}/bits.npy", f"{directory}/keys.npz")
+            for candidate in (index, loaded):
+                self.assertEqual(
+                    candidate.get_statement_ids(candidate.get_statement_mask([[("species_ids", ["rat"])]])).tolist(),
+                    [statements[0].id, statements[2].id],
+                )
+                self.assertEqual(
+                    candidate.get_statement_ids(
+                        candidate.get_statement_mask([[("species_ids", ["mouse"]), ("apinatomy", ["keast"])]])
+                    ).tolist(),
+                    [statement.id for statement in statements],
+                )
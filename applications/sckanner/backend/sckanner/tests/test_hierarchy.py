@@ -0,0 +1,42 @@
+import threading
+import time
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from sckanner.models import HierarchyNode
+from sckanner.services.hierarchy import materialize_snapshot_hierarchy
+from sckanner.tests.utils import create_snapshot
+
+
+class MaterializeHierarchyTests(TransactionTestCase):
+    def test_concurrent_materializations(self):
+        first = create_snapshot("1")
+        second = create_snapshot("2", source=first.source)
+        errors = []
+
+        def materialize_second():
+            try:
+                materialize_snapshot_hierarchy(second)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            materialize_snapshot_hierarchy(first)
+            # The other materialization starts before this one commits
+            thread = threading.Thread(target=materialize_second)
+            thread.start()
+            time.sleep(0.5)
+        thread.join()
+
+        self.assertEqual(errors, [])
+        roots = HierarchyNode.get_root_nodes()
+        self.assertEqual(sorted(root.snapshot_id for root in roots), [first.id, second.id])
+        self.assertEqual(len({root.path for root in roots}), 2)
+
+        # Materializing again replaces the tree of the snapshot
+        node_count = HierarchyNode.objects.filter(snapshot=first).count()
+        materialize_snapshot_hierarchy(first)
+        self.assertEqual(HierarchyNode.objects.filter(snapshot=first).count(), node_count)
@@ -0,0 +1,71 @@
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from sckanner.models import ConnectivityStatement
+from sckanner.services.ingestion.connectivity_statement_adapter import ConnectivityStatementAdapter
+from sckanner.services.ingestion.ingest_datasnapshot_connectivity_statements import (
+    ingest_datasnapshot_connectivity_statements,
+)
+from sckanner.tests.utils import create_snapshot, create_source, valid_statement
+
+
+class IngestionTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, STATEMENT_VALIDATION_WORKERS=1)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def ingest(self, source, version, base_snapshot=None, validation_policy=None):
+        snapshot = create_snapshot(version, source=source)
+        adapter = ConnectivityStatementAdapter(source, snapshot, base_snapshot, validation_policy)
+        ingest_datasnapshot_connectivity_statements(adapter.extract_statements(), snapshot, base_snapshot)
+        snapshot.refresh_from_db()
+        return snapshot, adapter
+
+
+class IncrementalIngestionTests(IngestionTestCase):
+    def test_unchanged_statements_of_the_base_snapshot_are_reused(self):
+        source = create_source(
+            {
+                "1": [valid_statement(number) for number in range(5)],
+                # 0-2 unchanged, 3 changed, 4 removed, 5 new
+                "2": [valid_statement(number) for number in range(3)]
+                + [valid_statement(3, statement_preview="changed"), valid_statement(5)],
+            }
+        )
+        base, _ = self.ingest(source, "1")
+        ConnectivityStatement.objects.filter(snapshot=base).update(forward_ids=[1], reverse_ids=[2], forward_paths=[[1]])
+
+        snapshot, _ = self.ingest(source, "2", base_snapshot=base)
+        self.assertEqual(snapshot.base_snapshot, base)
+        self.assertEqual(
+            (snapshot.reused_statement_count, snapshot.changed_statement_count, snapshot.removed_statement_count),
+            (3, 2, 1),
+        )
+        base_documents = dict(ConnectivityStatement.objects.filter(snapshot=base).values_list("reference_uri", "document_id"))
+        statements = {statement.reference_uri: statement for statement in ConnectivityStatement.objects.filter(snapshot=snapshot)}
+        self.assertEqual(sorted(statements), [f"http://s/{number}" for number in (0, 1, 2, 3, 5)])
+        for number in range(3):
+            statement = statements[f"http://s/{number}"]
+            self.assertEqual(statement.document_id, base_documents[statement.reference_uri])
+            # The forward graph is rebuilt per snapshot
+            self.assertEqual((statement.forward_ids, statement.reverse_ids, statement.forward_paths), ([], [], []))
+            self.assertEqual(statement.apinatomy, "keast")
+        self.assertNotEqual(statements["http://s/3"].document_id, base_documents["http://s/3"])
+        self.assertEqual(statements["http://s/3"].document.data["statement_preview"], "changed")
+
+    def test_only_unchanged_statements_are_marked_reused(self):
+        source = create_source(
+            {
+                "1": [valid_statement(0), valid_statement(1)],
+                "2": [valid_statement(0), valid_statement(1, statement_preview="changed"), valid_statement(0)],
+            }
+        )
+        base, _ = self.ingest(source, "1")
+        snapshot = create_snapshot("2", source=source)
+        statements = ConnectivityStatementAdapter(source, snapshot, base).extract_statements().statements
+        # A base statement is reused once: the second copy of statement 0 is not
+        self.assertEqual([statement.reused for statement in statements], [True, False, False])
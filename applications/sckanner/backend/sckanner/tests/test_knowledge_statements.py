@@ -0,0 +1,113 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from sckanner.services.knowledge_statements import (
+    KNOWLEDGE_STATEMENTS_LOOKUP_MAX_SIZE,
+    KNOWLEDGE_STATEMENTS_MAX_FIELDS,
+    parse_statement_fields,
+)
+from sckanner.tests.utils import create_snapshot, create_statement, valid_statement
+
+
+class StatementFieldsTests(TestCase):
+    def test_parse(self):
+        self.assertIsNone(parse_statement_fields(None))
+        self.assertIsNone(parse_statement_fields(" , "))
+        self.assertEqual(parse_statement_fields("id, sex,id,,vias"), ["id", "sex", "vias"])
+
+    def test_unknown_fields(self):
+        with self.assertRaisesMessage(ValueError, "Invalid statement fields: unknown, id)"):
+            parse_statement_fields("id,unknown,id)")
+
+    def test_too_many_fields(self):
+        fields = ",".join(f"field_{number}" for number in range(KNOWLEDGE_STATEMENTS_MAX_FIELDS + 1))
+        with self.assertRaisesMessage(ValueError, f"At most {KNOWLEDGE_STATEMENTS_MAX_FIELDS} statement fields"):
+            parse_statement_fields(fields)
+        # Duplicates do not count
+        self.assertEqual(parse_statement_fields(",".join(["id"] * (KNOWLEDGE_STATEMENTS_MAX_FIELDS + 1))), ["id"])
+
+
+class KnowledgeStatementsPageTests(TestCase):
+    def setUp(self):
+        self.snapshot = create_snapshot()
+        self.statements = [valid_statement(number) for number in range(3)]
+        for data in self.statements:
+            create_statement(self.snapshot, data)
+
+    def get_page(self, **params):
+        return self.client.get("/api/v2/knowledge-statements", {"datasnapshot_id": self.snapshot.id, **params})
+
+    def test_whole_statements(self):
+        response = self.get_page(limit=2)
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(page["items"], self.statements[:2])
+        page = self.get_page(limit=2, cursor=page["next_cursor"]).json()
+        self.assertEqual(page, {"items": self.statements[2:], "next_cursor": None})
+
+    def test_fields_projection(self):
+        response = self.get_page(fields="id,statement_preview,id,sex")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["items"],
+            [
+                {"id": data["id"], "statement_preview": data["statement_preview"], "sex": None}
+                for data in self.statements
+            ],
+        )
+
+    def test_invalid_fields(self):
+        self.assertEqual(self.get_page(fields="id,unknown").status_code, 400)
+        fields = ",".join(f"field_{number}" for number in range(KNOWLEDGE_STATEMENTS_MAX_FIELDS + 1))
+        self.assertEqual(self.get_page(fields=fields).status_code, 400)
+
+
+class KnowledgeStatementsLookupTests(TestCase):
+    def setUp(self):
+        self.snapshot = create_snapshot()
+        self.statements = [valid_statement(number) for number in range(3)]
+        for data in self.statements:
+            create_statement(self.snapshot, data)
+
+    def lookup(self, reference_uris, **fields):
+        return self.client.post(
+            "/api/knowledge-statements/lookup",
+            {"datasnapshot_id": self.snapshot.id, "reference_uris": reference_uris, **fields},
+            content_type="application/json",
+        )
+
+    def test_order_and_missing(self):
+        response = self.lookup(["http://s/2", "http://s/9", "http://s/0", "http://s/2"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"items": [self.statements[2], self.statements[0]], "missing": ["http://s/9"]}
+        )
+
+    def test_fields_projection(self):
+        response = self.lookup(["http://s/1"], fields=["id", "reference_uri"])
+        self.assertEqual(response.json()["items"], [{"id": 1, "reference_uri": "http://s/1"}])
+        self.assertEqual(self.lookup(["http://s/1"], fields=["unknown"]).status_code, 400)
+
+    def test_large_lookup(self):
+        reference_uris = [f"http://s/{number}" for number in range(KNOWLEDGE_STATEMENTS_LOOKUP_MAX_SIZE)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.lookup(reference_uris[::-1])
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result["items"], self.statements[::-1])
+        self.assertEqual(len(result["missing"]), KNOWLEDGE_STATEMENTS_LOOKUP_MAX_SIZE - 3)
+        # The reference URIs are bound as one array
+        lookup_query = next(query["sql"] for query in queries if "reference_uri" in query["sql"])
+        self.assertIn("= ANY(", lookup_query)
+        self.assertNotIn(" IN (", lookup_query)
+
+        self.assertEqual(self.lookup(reference_uris + ["http://s/extra"]).status_code, 400)
+
+    def test_unknown_snapshot(self):
+        response = self.client.post(
+            "/api/knowledge-statements/lookup",
+            {"datasnapshot_id": self.snapshot.id + 1000, "reference_uris": ["http://s/0"]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 404)
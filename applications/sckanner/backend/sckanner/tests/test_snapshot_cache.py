@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+
+class CacheStatsTests(TestCase):
+    def test_staff_only(self):
+        self.assertEqual(self.client.get("/api/cache-stats").status_code, 401)
+
+        user = User.objects.create_user("user", password="password")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/api/cache-stats").status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get("/api/cache-stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.json()), {"entries", "size_bytes", "max_bytes", "hits", "misses", "evictions"}
+        )
@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from sckanner.tests.utils import create_snapshot, create_statement
+
+
+class SnapshotDiffTests(TestCase):
+    def test_diff_by_reference_uri_and_content(self):
+        base = create_snapshot("1")
+        other = create_snapshot("2", source=base.source)
+        for number in range(3):
+            create_statement(base, {"reference_uri": f"http://s/{number}", "statement_preview": "preview", "id": number})
+        create_statement(other, {"reference_uri": "http://s/0", "statement_preview": "preview", "id": 0})
+        create_statement(other, {"reference_uri": "http://s/1", "statement_preview": "changed", "id": 1})
+        create_statement(other, {"reference_uri": "http://s/3", "statement_preview": "preview", "id": 3})
+        # Statements without a reference URI cannot be matched
+        create_statement(other, {"statement_preview": "preview"})
+
+        response = self.client.get(f"/api/datasnapshots/{base.id}/diff/{other.id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "base_id": base.id,
+                "other_id": other.id,
+                "added": ["http://s/3"],
+                "removed": ["http://s/2"],
+                "modified": [{"reference_uri": "http://s/1", "fields": ["statement_preview"]}],
+            },
+        )
+        reverse = self.client.get(f"/api/datasnapshots/{other.id}/diff/{base.id}").json()
+        self.assertEqual((reverse["added"], reverse["removed"]), (["http://s/2"], ["http://s/3"]))
+
+    def test_unknown_snapshot(self):
+        base = create_snapshot("1")
+        self.assertEqual(self.client.get(f"/api/datasnapshots/{base.id}/diff/{base.id + 1000}").status_code, 404)
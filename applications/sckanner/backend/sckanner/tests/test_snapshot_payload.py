@@ -0,0 +1,118 @@
+import hashlib
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from sckanner.services.snapshot_entities import build_snapshot_entities
+from sckanner.services.snapshot_payload import (
+    get_accepted_binary_format,
+    get_accepted_encoding,
+    get_snapshot_payload_hashes,
+    get_snapshot_payload_path,
+    write_snapshot_payloads,
+)
+from sckanner.tests.utils import create_snapshot, create_statement, entity, valid_statement
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    def test_encoding(self):
+        cases = {
+            "": "identity",
+            "gzip": "gzip",
+            "gzip, br": "br",
+            "br;q=0, gzip": "gzip",
+            "*": "br",
+            "*, br;q=0": "gzip",
+        }
+        for accept_encoding, encoding in cases.items():
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(get_accepted_encoding(accept_encoding), encoding)
+
+
+class AcceptBinaryFormatTests(SimpleTestCase):
+    def test_binary_format(self):
+        cases = {
+            "": None,
+            "*/*": None,
+            "application/json": None,
+            "application/msgpack": "msgpack",
+            "application/msgpack, */*;q=0.8": "msgpack",
+            "application/msgpack, */*": None,
+            "application/json, application/msgpack;q=0.1": None,
+            "application/json;q=0.5, application/msgpack": "msgpack",
+            "application/*;q=0.9, application/msgpack": "msgpack",
+            "application/msgpack;q=0": None,
+            # Arrow is a format of its own, asked for with format=arrow
+            "application/vnd.apache.arrow.stream": None,
+        }
+        for accept, payload_format in cases.items():
+            with self.subTest(accept=accept):
+                self.assertEqual(get_accepted_binary_format(accept), payload_format)
+
+
+class SnapshotPayloadETagTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.snapshot = create_snapshot(content_hash="0" * 64)
+        for number in range(3):
+            create_statement(self.snapshot, valid_statement(number, origins=[entity(f"http://e/{number}")]))
+
+    def write_payloads(self):
+        build_snapshot_entities(self.snapshot)
+        write_snapshot_payloads(self.snapshot)
+        self.snapshot.payload_hashes = get_snapshot_payload_hashes(self.snapshot.id)
+        self.snapshot.save(update_fields=["payload_hashes"])
+
+    def get_statements(self, payload_format="full", **headers):
+        return self.client.get(
+            "/api/knowledge-statements",
+            {"datasnapshot_id": self.snapshot.id, "format": payload_format},
+            headers=headers,
+        )
+
+    def test_each_payload_file_has_its_own_etag(self):
+        self.write_payloads()
+        for payload_format, encoding, headers in [
+            ("full", "identity", {}),
+            ("full", "gzip", {"Accept-Encoding": "gzip"}),
+            ("compact", "br", {"Accept-Encoding": "br"}),
+            ("msgpack", "identity", {"Accept": "application/msgpack"}),
+            ("arrow", "identity", {}),
+        ]:
+            with self.subTest(payload_format=payload_format, encoding=encoding):
+                path = get_snapshot_payload_path(self.snapshot.id, encoding, payload_format)
+                with open(path, "rb") as payload_file:
+                    content = payload_file.read()
+                response = self.get_statements("full" if payload_format == "msgpack" else payload_format, **headers)
+                self.assertEqual(response.content, content)
+                self.assertEqual(response["ETag"], f'"{hashlib.sha256(content).hexdigest()}"')
+                self.assertIn("immutable", response["Cache-Control"])
+
+                not_modified = self.get_statements(
+                    "full" if payload_format == "msgpack" else payload_format, If_None_Match=response["ETag"], **headers
+                )
+                self.assertEqual(not_modified.status_code, 304)
+
+    def test_rewritten_payload_gets_a_new_etag(self):
+        self.write_payloads()
+        etag = self.get_statements("compact")["ETag"]
+        # e.g. the compact encoder changed and the artifacts were rebuilt: the snapshot content is the same
+        with open(get_snapshot_payload_path(self.snapshot.id, payload_format="compact"), "ab") as payload_file:
+            payload_file.write(b" ")
+        self.snapshot.payload_hashes = get_snapshot_payload_hashes(self.snapshot.id)
+        self.snapshot.save(update_fields=["payload_hashes"])
+
+        response = self.get_statements("compact", If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_streamed_statements_are_not_immutable(self):
+        response = self.get_statements("compact")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("immutable", response.get("Cache-Control", ""))
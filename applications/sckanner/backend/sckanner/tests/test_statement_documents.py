@@ -0,0 +1,73 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from sckanner.models import ConnectivityStatement, StatementDocument
+from sckanner.services.statement_documents import save_statement_documents
+from sckanner.services.statement_fields import get_statement_content_hash
+from sckanner.tests.utils import create_snapshot, create_statement
+
+
+class StatementDocumentTests(TestCase):
+    def test_documents_are_stored_once(self):
+        data = {"reference_uri": "http://s/0", "statement_preview": "preview"}
+        content_hash = get_statement_content_hash(data)
+        document_ids = save_statement_documents({content_hash: data})
+        self.assertEqual(save_statement_documents({content_hash: data}), document_ids)
+
+        source_snapshot = create_snapshot("1")
+        first = create_statement(source_snapshot, data)
+        second = create_statement(create_snapshot("2", source=source_snapshot.source), dict(reversed(data.items())))
+        self.assertEqual(first.document_id, second.document_id)
+        self.assertEqual(StatementDocument.objects.count(), 1)
+
+    def test_deleting_a_snapshot_deletes_its_orphan_documents(self):
+        first = create_snapshot("1")
+        second = create_snapshot("2", source=first.source)
+        shared = create_statement(first, {"reference_uri": "http://s/0"})
+        create_statement(second, {"reference_uri": "http://s/0"})
+        own = create_statement(first, {"reference_uri": "http://s/1"})
+        unrelated_orphan = save_statement_documents({"orphan": {"reference_uri": "http://s/2"}})["orphan"]
+
+        first.delete()
+        self.assertTrue(StatementDocument.objects.filter(id=shared.document_id).exists())
+        self.assertFalse(StatementDocument.objects.filter(id=own.document_id).exists())
+        # Only the documents of the deleted snapshot are swept
+        self.assertTrue(StatementDocument.objects.filter(id=unrelated_orphan).exists())
+
+
+class StatementDocumentMigrationTests(TransactionTestCase):
+    migrate_from = [("sckanner", "0019_snapshotfacetvalue")]
+    migrate_to = [("sckanner", "0020_statementdocument")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_backfill_of_existing_statements(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        DataSource = apps.get_model("sckanner", "DataSource")
+        DataSnapshot = apps.get_model("sckanner", "DataSnapshot")
+        OldConnectivityStatement = apps.get_model("sckanner", "ConnectivityStatement")
+        source = DataSource.objects.create(name="Source", reference_uri_key="reference_uri")
+        for version in ("1", "2"):
+            snapshot = DataSnapshot.objects.create(source=source, version=version)
+            for number in range(3):
+                data = {"reference_uri": f"http://s/{number}", "statement_preview": f"preview {number}"}
+                if version == "2" and number == 2:
+                    data["statement_preview"] = "changed"
+                OldConnectivityStatement.objects.create(snapshot=snapshot, reference_uri=data["reference_uri"], data=data)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        apps = executor.loader.project_state(self.migrate_to).apps
+        NewConnectivityStatement = apps.get_model("sckanner", "ConnectivityStatement")
+        NewStatementDocument = apps.get_model("sckanner", "StatementDocument")
+        self.assertEqual(NewStatementDocument.objects.count(), 4)
+        self.assertFalse(NewStatementDocument.objects.filter(search_vector__isnull=True).exists())
+        for statement in NewConnectivityStatement.objects.select_related("document"):
+            self.assertEqual(statement.document.data["reference_uri"], statement.reference_uri)
+            self.assertEqual(statement.document.content_hash, get_statement_content_hash(statement.document.data))
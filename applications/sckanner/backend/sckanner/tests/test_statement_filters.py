@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+
+from sckanner.schema import KnowledgeStatementFiltersSchema
+from sckanner.services.statement_filters import get_normalized_filters_hash
+
+
+class NormalizedFiltersHashTests(SimpleTestCase):
+    def test_equivalent_filters_hash_the_same(self):
+        first = KnowledgeStatementFiltersSchema(species=["b", "a", "a"], origin=["x"])
+        second = KnowledgeStatementFiltersSchema(origin=["x"], species=["a", "b"])
+        self.assertEqual(get_normalized_filters_hash(first), get_normalized_filters_hash(second))
+
+    def test_different_filters_or_params_hash_differently(self):
+        filters = KnowledgeStatementFiltersSchema(species=["a"])
+        self.assertNotEqual(
+            get_normalized_filters_hash(filters), get_normalized_filters_hash(KnowledgeStatementFiltersSchema(origin=["a"]))
+        )
+        self.assertNotEqual(get_normalized_filters_hash(filters), get_normalized_filters_hash(filters, nerve=["a"]))
+        self.assertEqual(
+            get_normalized_filters_hash(filters, nerve=["b", "a"]), get_normalized_filters_hash(filters, nerve=["a", "b"])
+        )
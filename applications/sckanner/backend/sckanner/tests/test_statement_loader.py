@@ -0,0 +1,75 @@
+from django.test import SimpleTestCase, TestCase
+
+from sckanner.models import ConnectivityStatement, DataSnapshot, DataSource
+from sckanner.services.ingestion.statement_loader import (
+    _encode_copy_value,
+    encode_copy_rows,
+    get_copy_fields,
+    load_connectivity_statements,
+)
+from sckanner.services.statement_documents import save_statement_documents
+from sckanner.services.statement_fields import extract_statement_filter_fields, get_statement_content_hash
+
+
+def get_field(name):
+    return ConnectivityStatement._meta.get_field(name)
+
+
+class CopyEncodingTests(SimpleTestCase):
+    def test_null_and_empty_text(self):
+        self.assertEqual(_encode_copy_value(get_field("reference_uri"), None), "")
+        self.assertEqual(_encode_copy_value(get_field("reference_uri"), ""), '""')
+
+    def test_text_quotes_are_doubled_and_backslashes_kept(self):
+        field = get_field("apinatomy")
+        self.assertEqual(_encode_copy_value(field, 'say "hi"'), '"say ""hi"""')
+        self.assertEqual(_encode_copy_value(field, "a\\b,c\nd"), '"a\\b,c\nd"')
+
+    def test_json(self):
+        self.assertEqual(_encode_copy_value(get_field("forward_paths"), [["a\"b"]]), '"[[""a\\""b""]]"')
+
+    def test_array_elements(self):
+        field = get_field("species_ids")
+        self.assertEqual(_encode_copy_value(field, []), '"{}"')
+        self.assertEqual(_encode_copy_value(field, ["a", None, ""]), '"{""a"",NULL,""""}"')
+        # Array element escaping first, then CSV quote doubling
+        self.assertEqual(_encode_copy_value(field, ['x"y', "p\\q"]), '"{""x\\""y"",""p\\\\q""}"')
+
+    def test_rows(self):
+        statement = ConnectivityStatement(reference_uri=None, snapshot_id=1, document_id=2, apinatomy="m")
+        fields = [get_field(name) for name in ("reference_uri", "snapshot", "document", "apinatomy", "origin_ids")]
+        self.assertEqual(encode_copy_rows([statement, statement], fields), ',"1","2","m","{}"\n' * 2)
+
+
+class StatementLoaderTests(TestCase):
+    def test_copy_loaded_statement_reads_back_as_bulk_created(self):
+        source = DataSource.objects.create(name="Source", reference_uri_key="reference_uri")
+        snapshot = DataSnapshot.objects.create(source=source, version="1")
+        data = {
+            "phenotype": {"name": 'Sympathetic "pre", ganglionic'},
+            "circuit_type": "",
+            "apinatomy_model": "model\\with\\backslashes",
+            "species": [{"ontology_uri": "http://x/{braces},comma\\end"}, {"ontology_uri": "ünïcode\nline"}],
+            "origins": [{"simple_entity": {"ontology_uri": 'quote"d'}}],
+        }
+        content_hash = get_statement_content_hash(data)
+        document_id = save_statement_documents({content_hash: data})[content_hash]
+
+        def statement(reference_uri):
+            return ConnectivityStatement(
+                reference_uri=reference_uri,
+                snapshot=snapshot,
+                document_id=document_id,
+                forward_ids=[3, 1],
+                forward_paths=[["a\"b", None], []],
+                **extract_statement_filter_fields(data),
+            )
+
+        self.assertEqual(load_connectivity_statements([statement("http://s/copy")]), 1)
+        ConnectivityStatement.objects.bulk_create([statement("http://s/bulk")])
+
+        fields = [field.name for field in get_copy_fields() if field.name != "reference_uri"]
+        copied = ConnectivityStatement.objects.filter(reference_uri="http://s/copy").values(*fields).get()
+        created = ConnectivityStatement.objects.filter(reference_uri="http://s/bulk").values(*fields).get()
+        self.assertEqual(copied, created)
+        self.assertEqual(copied["species_ids"], ["http://x/{braces},comma\\end", "ünïcode\nline"])
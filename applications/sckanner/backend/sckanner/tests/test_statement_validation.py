@@ -0,0 +1,91 @@
+import json
+import os
+
+from django.test import SimpleTestCase
+
+from sckanner.models import ConnectivityStatement
+from sckanner.services.datasnapshot import get_snapshot_artifacts_directory
+from sckanner.services.ingestion.logger_service import logger
+from sckanner.services.ingestion.statement_validation import (
+    QUARANTINE_FILENAME,
+    StatementValidationReport,
+    get_statement_errors,
+    iter_validation_errors,
+)
+from sckanner.tests.test_ingestion import IngestionTestCase
+from sckanner.tests.utils import create_source, valid_statement
+
+
+def invalid_statement(number: int) -> dict:
+    statement = valid_statement(number, id="x")
+    del statement["sex"]
+    return statement
+
+
+class StatementValidationTests(SimpleTestCase):
+    def test_errors_of_a_statement(self):
+        self.assertEqual(get_statement_errors(valid_statement(0)), [])
+        self.assertEqual(
+            get_statement_errors(invalid_statement(0)),
+            ["id: 'x' is not of type 'integer'", "(statement): 'sex' is a required property"],
+        )
+
+    def test_statements_keep_their_order_in_process_and_in_a_pool(self):
+        statements = [invalid_statement(number) if number % 97 == 3 else valid_statement(number) for number in range(450)]
+        expected = [(statement, bool(statement["id"] == "x")) for statement in statements]
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = iter_validation_errors(iter(statements), workers=workers)
+                self.assertEqual([(statement, bool(errors)) for statement, errors in results], expected)
+
+    def test_statements_not_to_validate(self):
+        results = list(iter_validation_errors([invalid_statement(0)], get_statement=lambda statement: None, workers=1))
+        self.assertEqual(results, [(invalid_statement(0), [])])
+
+    def test_summary(self):
+        with self.assertRaises(ValueError):
+            StatementValidationReport(1, "ignore")
+        report = StatementValidationReport(1, "skip")
+        with self.assertLogs(logger, "ERROR") as logs:
+            for number in range(22):
+                report.add(number, f"http://s/{number}", {}, ["error"])
+            report.add(22, None, {}, ["no reference URI"])
+            report.add(23, "http://s/0", {}, ["duplicate"])
+        self.assertEqual(len(logs.records), 24)
+        summary = report.get_summary().split("\n")
+        self.assertEqual(summary[0], "24 invalid statements skipped:")
+        self.assertEqual(summary[1], "http://s/0: error")
+        self.assertEqual(summary[-1], "... and 4 more")
+        self.assertEqual(list(report.errors)[-2:], ["#22", "#23"])
+
+
+class ValidationPolicyTests(IngestionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = create_source(
+            {"1": [valid_statement(0), invalid_statement(1), valid_statement(2), invalid_statement(3)]}
+        )
+
+    def test_fail(self):
+        with self.assertRaisesMessage(ValueError, "2 invalid statements found:\nhttp://s/1: id: 'x' is not of type"):
+            self.ingest(self.source, "1", validation_policy="fail")
+        self.assertFalse(ConnectivityStatement.objects.exists())
+
+    def test_skip(self):
+        snapshot, adapter = self.ingest(self.source, "1", validation_policy="skip")
+        self.assertEqual(
+            sorted(ConnectivityStatement.objects.filter(snapshot=snapshot).values_list("reference_uri", flat=True)),
+            ["http://s/0", "http://s/2"],
+        )
+        self.assertEqual(list(adapter.validation_report.errors), ["http://s/1", "http://s/3"])
+        self.assertTrue(adapter.validation_report.get_summary().startswith("2 invalid statements skipped:"))
+        self.assertFalse(os.path.exists(os.path.join(get_snapshot_artifacts_directory(snapshot.id), QUARANTINE_FILENAME)))
+
+    def test_quarantine(self):
+        snapshot, _ = self.ingest(self.source, "1", validation_policy="quarantine")
+        self.assertEqual(ConnectivityStatement.objects.filter(snapshot=snapshot).count(), 2)
+        with open(os.path.join(get_snapshot_artifacts_directory(snapshot.id), QUARANTINE_FILENAME)) as quarantine_file:
+            records = [json.loads(line) for line in quarantine_file]
+        self.assertEqual([(record["position"], record["reference_uri"]) for record in records], [(1, "http://s/1"), (3, "http://s/3")])
+        self.assertEqual(records[0]["statement"], invalid_statement(1))
+        self.assertIn("'sex' is a required property", records[0]["errors"][1])
@@ -0,0 +1,75 @@
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from sckanner.models import ConnectivityStatement, DataSnapshot, DataSnapshotStatus, DataSource
+from sckanner.services.statement_documents import save_statement_documents
+from sckanner.services.statement_fields import extract_statement_filter_fields, get_statement_content_hash
+
+
+def create_snapshot(version: str = "1", source: DataSource = None, **fields) -> DataSnapshot:
+    source = source or DataSource.objects.create(name="Source", reference_uri_key="reference_uri")
+    fields.setdefault("status", DataSnapshotStatus.COMPLETED)
+    fields.setdefault("timestamp", timezone.now())
+    return DataSnapshot.objects.create(source=source, version=version, **fields)
+
+
+def create_statement(snapshot: DataSnapshot, data: dict, **fields) -> ConnectivityStatement:
+    """
+    A statement of the snapshot with its document stored, as ingestion does.
+    """
+    content_hash = get_statement_content_hash(data)
+    document_id = save_statement_documents({content_hash: data})[content_hash]
+    fields = {**extract_statement_filter_fields(data), **fields}
+    return ConnectivityStatement.objects.create(
+        snapshot=snapshot, reference_uri=data.get("reference_uri"), document_id=document_id, **fields
+    )
+
+
+def entity(ontology_uri: str, name: str = None, synonyms: str = "") -> dict:
+    return {
+        "id": 1,
+        "synonyms": synonyms,
+        "region_layer": None,
+        "simple_entity": {"id": 1, "name": name or ontology_uri, "ontology_uri": ontology_uri},
+    }
+
+
+def valid_statement(number: int, **fields) -> dict:
+    """
+    A statement document valid against the statement validator schema.
+    """
+    return {
+        "id": number,
+        "reference_uri": f"http://s/{number}",
+        "sex": None,
+        "vias": [],
+        "origins": [],
+        "destinations": [],
+        "species": [],
+        "journey": [],
+        "entities_journey": [],
+        "forward_connection": [],
+        "provenances": [],
+        "apinatomy_model": "keast",
+        "circuit_type": "SENSORY",
+        "knowledge_statement": f"statement {number}",
+        "laterality": "",
+        "phenotype": None,
+        "phenotype_id": None,
+        "projection": "",
+        "sentence_id": number,
+        "statement_preview": f"preview {number}",
+        **fields,
+    }
+
+
+def create_source(statements_by_version: dict) -> DataSource:
+    """
+    A source whose get_statements returns the statements of the requested version.
+    The file is stored in MEDIA_ROOT, which tests override with a temporary directory.
+    """
+    code = f"STATEMENTS = {statements_by_version!r}\n\n\ndef get_statements(version='', **kwargs):\n    return STATEMENTS[version]\n"
+    source = DataSource(name="Source", reference_uri_key="reference_uri")
+    source.python_code_file_for_statements_retrieval.save("source.py", ContentFile(code.encode()), save=False)
+    source.save()
+    return source
@@ -1,3 +1,31 @@
-from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.views.static import serve
 
-# Create your views here.
+from sckanner.models import DataSnapshot, DataSnapshotStatus
+from sckanner.services.http_cache import get_snapshot_etag, patch_immutable_cache_control
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """
+    Serve the media files, adding validators and long-lived cache headers
+    to the A-B-via-C files of completed snapshots, which never change.
+    """
+    a_b_via_c_json_directory = DataSnapshot._meta.get_field("a_b_via_c_json_file").upload_to
+    content_hash = None
+    if path.startswith(a_b_via_c_json_directory):
+        content_hash = (
+            DataSnapshot.objects.filter(a_b_via_c_json_file=path, status=DataSnapshotStatus.COMPLETED)
+            .values_list("content_hash", flat=True)
+            .first()
+        )
+    if not content_hash:
+        return serve(request, path, document_root=document_root, show_indexes=show_indexes)
+
+    etag = get_snapshot_etag(content_hash)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        patch_immutable_cache_control(response)
+    return response